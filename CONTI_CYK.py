@@ -10,92 +10,15 @@
 # The code should be submitted on Moodle before Thursday 2 december 23:59
 # ----------------------------------------------------------------------------------
 
-class Symbol:
-    # field name: string
-    # (no methods)
-
-    def __init__(self, name):
-        # name: String
-
-        self.name = name
-
-    def __str__(self):
-        return self.name
-
-
-class Rule:
-    # field lhs: Symbol
-    # field rhs: list of Symbol
-    # (no methods)
-
-    def __init__(self, lhs, rhs):
-        # lhs: Symbol (left hand side)
-        # rhs: list of Symbol (right hand side)
-
-        self.lhs = lhs
-        self.rhs = rhs
-
-    def __str__(self):
-        return str(self.lhs) + " --> [" + ",".join([str(s) for s in self.rhs]) + "]"
-
-
-class Grammar:
-    # field symbols: list of Symbol
-    # field axiom: Symbol
-    # field rules: list of Rule
-    # field name: string
-    # field nonTerminals: set of Symbol
-    # method createNewSymbol: String -> Symbol
-    # method isNonTerminal: Symbol -> Boolean
-
-    def __init__(self, symbols, axiom, rules, name):
-        # symbols: list of Symbol
-        # axiom: Symbol
-        # rules: list of Rule
-        # name: String
-
-        self.symbols = symbols
-        self.axiom = axiom
-        self.rules = rules
-        self.name = name
+import time
+from itertools import islice
 
-        self.nonTerminals = set()
-        for rule in rules:
-            self.nonTerminals.add(rule.lhs)
+from CONTI_Grammar import Symbol, Rule, Grammar
 
-    # Returns a new symbol (with a new name build from the argument)
-    def createNewSymbol(self, symbolName):
-        # symbolName: string
-
-        name = symbolName
-
-        ok = False
-        while (ok == False):
-            ok = True
-            for s in self.symbols:
-                if s.name == name:
-                    ok = False
-                    continue
-
-            if ok == False:
-                name = name + "'"
-
-        return Symbol(name)
-
-    def isNonTerminal(self, symbol):
-        # symbol: Symbol
-
-        return symbol in self.nonTerminals
-
-    def __str__(self):
-        return "{" + \
-               "symbols = [" + ",".join([str(s) for s in self.symbols]) + "] " + \
-               "axiom = " + str(self.axiom) + " " + \
-               "rules = [" + ", ".join(str(r) for r in self.rules) + "]" + \
-               "}"
 
 class Tree:
-    # field branches: list of length 1 or 2 (only two possibilities in CNF).
+    # field branches: list of length 1 or 2 (only two possibilities in CNF),
+    #                 of any length for the trees given back with the rules of a grammar converted to CNF
     # field label: Symbol
     # (no methods)
 
@@ -104,10 +27,55 @@ class Tree:
         self.label = label
 
     def __str__(self):
-        if len(self.branches) == 1:
-            return "[ " + self.label.name + ", " + str(self.branches[0]) + " ]"
-        else:
-            return "[ " + self.label.name + ", " + str(self.branches[0]) + ", " + str(self.branches[1]) + " ]"
+        return "[ " + self.label.name + ", " + ", ".join(str(b) for b in self.branches) + " ]"
+
+
+class ForestNode:
+    # All the trees of label `label` for the subword u[i] ... u[j-1], shared by every
+    # tree of the table that uses one of them as a branch (packed parse forest)
+    # field label: Symbol
+    # field i: Integer
+    # field j: Integer
+    # field alternatives: list of tuple: (Symbol,) for a rule A -> a, (ForestNode, ForestNode)
+    #                     for each split and rule A -> BC that gives A for this subword,
+    #                     and () for the rule S -> ε of the axiom (for the empty word)
+    # method trees: -> iterator of Tree
+
+    def __init__(self, label, i, j):
+        self.label = label
+        self.i = i
+        self.j = j
+        self.alternatives = []
+
+    # Yields the trees of the node one by one, only building a tree when it is asked for.
+    # A tree is given by the alternative chosen at each of its nodes, in pre-order; the next
+    # tree increments the last choice that is not exhausted (the right branches vary the
+    # fastest). An explicit stack is used, so that deep trees do not exceed the recursion limit.
+    def trees(self):
+        choices = []  # index of the alternative chosen at each node of the tree, in pre-order
+        while self.alternatives:
+            counts = []  # number of alternatives of each node of the tree, in pre-order
+            root = Tree(self.label, [])
+            todo = [(self, root)]
+            while todo:
+                node, tree = todo.pop()
+                if len(counts) == len(choices):
+                    # a node not reached by the previous tree: its first alternative
+                    choices.append(0)
+                alt = node.alternatives[choices[len(counts)]]
+                counts.append(len(node.alternatives))
+                if len(alt) == 2:
+                    tree.branches = [Tree(alt[0].label, []), Tree(alt[1].label, [])]
+                    todo.append((alt[1], tree.branches[1]))
+                    todo.append((alt[0], tree.branches[0]))
+                else:
+                    tree.branches = list(alt)
+            yield root
+            while choices and choices[-1] + 1 == counts[len(choices) - 1]:
+                choices.pop()
+            if not choices:
+                return
+            choices[-1] += 1
 
 
 # Definition of the symbols
@@ -169,70 +137,137 @@ g2 = Grammar(
 # T[i, j] is the set of non-terminals A such that there exists
 # a derivation from A to the subword 'u[i] u[i+1] ... u[j-1]'
 # (i.e. A -->* u[i] ... u[j-1])
+# Each cell is a dictionary: id of A -> ForestNode of label A for this subword, so the
+# table has one node per (A, i, j) however many trees there are
 #
 # More details: handout of Yvon et Demaille (2016) P189, algorithm 14.4
 # ----------------------------------------------------------------------
 
-print ("Question 1 : Creation of the analysis table\n")
+if __name__ == "__main__":
+    print ("Question 1 : Creation of the analysis table\n")
 
 "Creation and initialization of the table T for the word u and the grammar gr"
 
 
 def init(u, gr):
-    # u: String (word to parse)
+    # u: word to parse (String or list of String tokens)
     # gr: Grammar
+    cg = gr.compile()   # integer tables of the grammar
+    w = cg.encode(u)    # the word as a list of terminal ids
     T = {}
     # The parse table T is initially empty: T[i, j] = ∅
     for i in range(len(u)):
         for j in range(i, len(u) + 1):
-            T[i, j] = set()
+            T[i, j] = {}
     #initialization of the diagonal with the rules that generate a terminal letter
     for i in range(len(u)):
-        for r in gr.rules:
-            if r.rhs[0].name == u[i]:
-                T[i, i+1].add(Tree(r.lhs, [r.rhs[0]])) # we add to the cell a unary tree ([A, a] for rule A->a)
+        initCell(T, i, w[i], cg)
+    # the empty word is only generated by the rule S -> ε
+    if len(u) == 0:
+        T[0, 0] = {}
+        if (cg.axiom, ()) in cg.rules:
+            T[0, 0][cg.axiom] = ForestNode(cg.symbols[cg.axiom], 0, 0)
+            T[0, 0][cg.axiom].alternatives.append(())
     return T
 
+
+"Filling the cell T[i, i+1] of the diagonal, for the letter of id t"
+
+def initCell(T, i, t, cg):
+    cell = T[i, i+1]
+    # only the rules A -> t are looked at (index of the rules by terminal)
+    for a in cg.lexical.get(t, ()):
+        if a not in cell:
+            cell[a] = ForestNode(cg.symbols[a], i, i+1)
+        cell[a].alternatives.append((cg.symbols[t],)) # we add to the cell a unary tree ([A, a] for rule A->a)
+
 "Filling the table T (initialization already done) for the word u and the grammar gr"
 
 # main loop where we look for constituents of increasing length
 def loop(T, u, gr):
-    # T: Dictionnary of sets? (parse table)
-    # u: String (word to parse)
+    # T: Dictionnary of dictionaries of ForestNode (parse table)
+    # u: word to parse (String or list of String tokens)
     # gr: Grammar
+    cg = gr.compile()   # integer tables of the grammar
     n = len(u)
     for l in range(2, n+1):   # loop on the length of span
         for i in range(0, n-l+1): # beginning
-            for k in range(i+1, i+l): # end
-                for r in gr.rules:
-                    if len(r.rhs) == 2: # if the rule is of the form A -> BC
-                        # check if B ∈ T[i,k] and C ∈ T[k,i+l]
-                        for t1 in T[i, k]:
-                            if r.rhs[0] == t1.label:
-                                for t2 in T[k, i+l]:
-                                    if r.rhs[1] == t2.label:
-                                        T[i, i+l].add(Tree(r.lhs, [t1, t2]))    # add a tree A with branches B and C
-                        '''if (r.rhs[0] in T[i, k].label) and (r.rhs[1] in T[k, i+l].label): # if B ∈ T[i,k] and C ∈ T[k,i+l]
-                            T[i, i+l].add(Tree(r.lhs, []))    # add A'''
+            fillCell(T, i, i+l, cg)
+
+
+"Filling the cell T[i, j] from the shorter cells of the table"
+
+def fillCell(T, i, j, cg):
+    cell = T[i, j]    # the cell being filled
+    for k in range(i+1, j): # end
+        left, right = T[i, k], T[k, j]
+        # only the pairs B ∈ T[i,k] and C ∈ T[k,j] that are really in the table are tried,
+        # and the index gives directly the rules A -> BC for such a pair
+        for b in left:
+            for c in right:
+                for a in cg.binary.get((b, c), ()):
+                    if a not in cell:
+                        cell[a] = ForestNode(cg.symbols[a], i, j)
+                    cell[a].alternatives.append((left[b], right[c]))    # add the trees A with branches B and C
 
 
 "Creation of the analysis table of the word u for the grammar gr"
 
-def buildTable(u, gr):
+def buildTable(u, gr, stats=None):
+    # stats: ParseStats (see CONTI_Stats) filled by the parse, None if nothing is counted
+    if stats is None:
+        T = init(u, gr)
+        loop(T, u, gr)
+        return T
+
+    start = time.perf_counter()
     T = init(u, gr)
+    stats.times["init"] = time.perf_counter() - start
+    start = time.perf_counter()
     loop(T, u, gr)
-
+    stats.times["loop"] = time.perf_counter() - start
+    countTable(T, gr, stats)
     return T
 
 
+"Fill stats with what is in the table T once it is built: the trees of each cell and the rules used for them"
+
+def countTable(T, gr, stats):
+    # T: table (as built by buildTable)
+    # gr: Grammar
+    # stats: ParseStats
+    cg = gr.compile()   # integer tables of the grammar
+    ruleNumber = {rule: r for r, rule in enumerate(cg.rules)}  # (lhs, rhs) -> number of the rule
+    trees = {}  # id of a ForestNode -> number of its trees
+    stats.operations["init"] = stats.operations["loop"] = 0
+    # the cells are read by increasing length, so the trees of the branches are already counted
+    for (i, j) in sorted(T, key=lambda ij: ij[1] - ij[0]):
+        stats.cellTrees[i, j] = 0
+        for a, node in T[i, j].items():
+            count = 0
+            for alt in node.alternatives:
+                if len(alt) == 2:
+                    r = ruleNumber[a, (cg.ids[alt[0].label.name], cg.ids[alt[1].label.name])]
+                    count += trees[id(alt[0])] * trees[id(alt[1])]
+                    stats.operations["loop"] += 1
+                else:
+                    r = ruleNumber[a, tuple(cg.ids[s.name] for s in alt)]
+                    count += 1
+                    stats.operations["init"] += 1
+                stats.ruleApplications[r] = stats.ruleApplications.get(r, 0) + 1
+            trees[id(node)] = count
+            stats.cellTrees[i, j] += count
+
+
 "Display a table T for a word of length n"
 
 def printT(T, n):
     for i in range(n):
         for j in range(i, n + 1):
-            print (str((i, j)) + ": " + ", ".join(str(t.label) for t in T[i, j]))
+            print (str((i, j)) + ": " + ", ".join(str(node.label) for node in T[i, j].values()))
 
-printT(buildTable("aaab", g2), 4)
+if __name__ == "__main__":
+    printT(buildTable("aaab", g2), 4)
 
 
 # ----------------------------------------------------------------------
@@ -240,48 +275,342 @@ printT(buildTable("aaab", g2), 4)
 # The following functions are only used to display the results,
 # and to easily perform some tests
 # ----------------------------------------------------------------------
-print("")
-print ("Question 2 : interpretation of the parse table")
+if __name__ == "__main__":
+    print("")
+    print ("Question 2 : interpretation of the parse table")
 
 "Once the table T is filled, determine if the analysis was successful"
 
 def isSuccess(T, u, gr):
-    # if S ∈ T[0,4] return True
-    for t in T[0, len(u)]:
-        if symS == t.label:
-            return True
-    # else return False
-    return False
+    # if S ∈ T[0,4] return True, else return False
+    return gr.compile().axiom in T[0, len(u)]
+
+
+"Once the parse is complete, yield one by one the syntax trees of the word from the table T"
+"(written with the rules of the original grammar if gr was converted to CNF: then only a part of"
+"the trees of the original grammar is given, see convertToCNF)"
+
+def iterTrees(T, u, gr):
+    node = T[0, len(u)].get(gr.compile().axiom)
+    if node is not None:
+        for t in node.trees():
+            yield gr.untransform(t)
+
+
+"Once the parse is complete, retrieve and display the syntax trees (at most limit of them if it is given) from the table T"
+
+def printTree(T, u, gr, limit=None):
+    for t in islice(iterTrees(T, u, gr), limit):
+        print(str(t))
+
+
+# ----------------------------------------------------------------------
+# Recognition only
+#
+# When we only want to know if the word is generated, the cells do not
+# need to hold trees: T[i, j] is an integer whose bit A is set if
+# A -->* u[i] ... u[j-1], so the table takes O(n² |N|) bits whatever the
+# number of derivations. For each A added to a cell of length >= 2 we
+# keep one backpointer (k, B, C), enough to rebuild one tree on demand.
+# ----------------------------------------------------------------------
+
+"Creation of the table of bitsets for the word u and the grammar gr, and initialization of its diagonal"
+
+def initBits(u, gr):
+    # u: word to parse (String or list of String tokens)
+    # gr: Grammar
+    cg = gr.compile()   # integer tables of the grammar
+    w = cg.encode(u)    # the word as a list of terminal ids
+    T = {}      # T[i, j]: Integer (bitset of the non-terminals of the cell)
+
+    # initialization of the diagonal with the rules A -> a
+    for i in range(len(u)):
+        T[i, i+1] = 0
+        for a in cg.lexical.get(w[i], ()):
+            T[i, i+1] |= 1 << a
+    # the empty word is only generated by the rule S -> ε
+    if len(u) == 0:
+        T[0, 0] = (1 << cg.axiom) if (cg.axiom, ()) in cg.rules else 0
+    return T
+
 
+"Creation of the table of bitsets of the word u for the grammar gr, with its backpointers"
 
-"Once the parse is complete, retrieve and display the syntax tree from the table T"
+def buildBitTable(u, gr):
+    # u: word to parse (String or list of String tokens)
+    # gr: Grammar
+    cg = gr.compile()   # integer tables of the grammar
+    n = len(u)
+    T = initBits(u, gr)
+    back = {}   # back[i, j, A]: (k, B, C) the split and the rule A -> BC that first put A in T[i, j]
+
+    for l in range(2, n+1):   # loop on the length of span
+        for i in range(0, n-l+1): # beginning
+            T[i, i+l] = bitCell(T, back, i, i+l, cg)
+
+    return T, back
+
+
+"Returns the bitset of the cell T[i, j] computed from the shorter cells of the table, and adds its backpointers to back"
+
+def bitCell(T, back, i, j, cg):
+    # T: Dictionnary of Integer (table of bitsets, filled for the spans shorter than j - i)
+    # back: Dictionnary of (Integer, Integer, Integer) (backpointers)
+    # cg: CompiledGrammar
+    bits = 0    # the cell being filled
+    for k in range(i+1, j): # end
+        right = T[k, j]
+        left = T[i, k] if right else 0
+        while left:     # for each B ∈ T[i,k]
+            low = left & -left
+            left ^= low
+            b = low.bit_length() - 1
+            cs = right & cg.rightOf.get(b, 0)
+            while cs:   # for each C ∈ T[k,j] such that there is a rule A -> BC
+                low = cs & -cs
+                cs ^= low
+                c = low.bit_length() - 1
+                for a in cg.binary[b, c]:
+                    if not (bits >> a) & 1:
+                        bits |= 1 << a
+                        back[i, j, a] = (k, b, c)
+    return bits
+
+
+"Once the table of bitsets is filled, determine if the analysis was successful"
+
+def isSuccessBits(T, u, gr):
+    return (T[0, len(u)] >> gr.compile().axiom) & 1 == 1
+
+
+"Rebuild from the backpointers one syntax tree of the axiom for the whole word (None if there is none),"
+"written with the rules of the original grammar if gr was converted to CNF"
+
+def bitTree(T, back, u, gr):
+    if not isSuccessBits(T, u, gr):
+        return None
+    cg = gr.compile()
+    w = cg.encode(u)
+    root = Tree(cg.symbols[cg.axiom], [])
+    # the tree is built without recursion (it can be as deep as the word is long):
+    # each element of the stack is a tree whose branches are still to be built, with its span
+    stack = [(root, cg.axiom, 0, len(u))]
+    while stack:
+        t, a, i, j = stack.pop()
+        if j == i:
+            t.branches = []
+        elif j == i + 1:
+            t.branches = [cg.symbols[w[i]]]
+        else:
+            k, b, c = back[i, j, a]
+            t1, t2 = Tree(cg.symbols[b], []), Tree(cg.symbols[c], [])
+            t.branches = [t1, t2]
+            stack.append((t1, b, i, k))
+            stack.append((t2, c, k, j))
+    return gr.untransform(root)
+
+
+"Display a table of bitsets T for a word of length n"
+
+def printBits(T, n, gr):
+    cg = gr.compile()
+    for i in range(n):
+        for j in range(i+1, n + 1):
+            print (str((i, j)) + ": " + ", ".join(str(cg.symbols[a]) for a in range(len(cg.symbols)) if (T[i, j] >> a) & 1))
+
+
+# ----------------------------------------------------------------------
+# Incremental version
+#
+# The table can also be filled column by column: the cells T[i, j] only
+# need the cells T[i, k] and T[k, j] with i < k < j, so when a letter is
+# added at the end of the word, only the new column T[., n+1] has to be
+# computed (from bottom to top) and the rest of the table is kept.
+# ----------------------------------------------------------------------
+
+class IncrementalCYK:
+    # field gr: Grammar
+    # field u: list of String (letters read so far)
+    # field T: parse table of u (the same as buildTable(u, gr))
+    # method extend: String -> (adds a letter at the end of the word)
+    # method isSuccess: -> Boolean
+    # method iterTrees: -> iterator of Tree
+
+    def __init__(self, gr):
+        # gr: Grammar
+        self.gr = gr
+        self.u = []
+        # the table of the empty word: T[0, 0] has the axiom if the rule S -> ε is in the grammar
+        self.T = init(self.u, gr)
+
+    # Adds the letter token at the end of the word and computes the new column of the table
+    def extend(self, token):
+        # token: String
+        cg = self.gr.compile()
+        n = len(self.u)     # the new letter is u[n], the new column is j = n+1
+        self.u.append(token)
+        for i in range(n + 1):
+            self.T[i, n+1] = {}
+        self.T[n, n] = {}
+        initCell(self.T, n, cg.encode([token])[0], cg)
+        for i in range(n-1, -1, -1):
+            fillCell(self.T, i, n+1, cg)
+
+    def isSuccess(self):
+        return isSuccess(self.T, self.u, self.gr)
+
+    def iterTrees(self):
+        return iterTrees(self.T, self.u, self.gr)
 
-def printTree(T, u, gr):
-    for t in T[0, len(u)]:
-        if symS == t.label:
-            print(str(t))
+
+# ----------------------------------------------------------------------
+# Weighted version (Viterbi)
+#
+# With weights on the rules (log-probabilities), the score of a tree is
+# the sum of the weights of its rules. Each cell only keeps the best
+# score of each label, with a backpointer to rebuild the best tree, and
+# can be pruned: only the labels whose score is at most threshold below
+# the best score of the cell, and at most the beam best ones, are kept.
+# ----------------------------------------------------------------------
+
+"Creation of the weighted table of the word u for the grammar gr"
+
+def buildViterbiTable(u, gr, beam=None, threshold=None):
+    # u: word to parse (String or list of String tokens)
+    # gr: Grammar
+    # beam: Integer (greatest number of labels kept in a cell, no limit if None)
+    # threshold: Float (greatest difference with the best score of the cell, no limit if None)
+    cg = gr.compile()   # integer tables of the grammar
+    w = cg.encode(u)    # the word as a list of terminal ids
+    n = len(u)
+    T = {}  # T[i, j]: dictionary id of A -> (best score of A for the subword, backpointer (k, B, C) or None for A -> a)
+
+    # initialization of the diagonal with the rules A -> a
+    for i in range(n):
+        cell = {}
+        for a in cg.lexical.get(w[i], ()):
+            cell[a] = (cg.weight[a, (w[i],)], None)
+        T[i, i+1] = prune(cell, beam, threshold)
+    # the empty word is only generated by the rule S -> ε
+    if n == 0:
+        T[0, 0] = {cg.axiom: (cg.weight[cg.axiom, ()], None)} if (cg.axiom, ()) in cg.weight else {}
+
+    for l in range(2, n+1):   # loop on the length of span
+        for i in range(0, n-l+1): # beginning
+            cell = {}   # the cell being filled
+            for k in range(i+1, i+l): # end
+                left, right = T[i, k], T[k, i+l]
+                for b in left:
+                    for c in right:
+                        for a in cg.binary.get((b, c), ()):
+                            score = cg.weight[a, (b, c)] + left[b][0] + right[c][0]
+                            if a not in cell or score > cell[a][0]:
+                                cell[a] = (score, (k, b, c))
+            T[i, i+l] = prune(cell, beam, threshold)
+
+    return T
+
+
+"Returns the cell without the labels that are out of the beam or below the threshold"
+
+def prune(cell, beam, threshold):
+    if not cell:
+        return cell
+    if threshold is not None:
+        best = max(score for score, bp in cell.values())
+        cell = {a: cell[a] for a in cell if cell[a][0] >= best - threshold}
+    if beam is not None and len(cell) > beam:
+        cell = dict(sorted(cell.items(), key=lambda entry: -entry[1][0])[:beam])
+    return cell
+
+
+"Rebuild from the backpointers the best syntax tree of the axiom for the whole word:"
+"returns (score, tree), or None if the word was not recognized (or was pruned)"
+
+def viterbiTree(T, u, gr):
+    cg = gr.compile()
+    if cg.axiom not in T[0, len(u)]:
+        return None
+    w = cg.encode(u)
+    root = Tree(cg.symbols[cg.axiom], [])
+    # each element of the stack is a tree whose branches are still to be built, with its span
+    stack = [(root, cg.axiom, 0, len(u))]
+    while stack:
+        t, a, i, j = stack.pop()
+        bp = T[i, j][a][1]
+        if bp is None:
+            t.branches = [cg.symbols[w[i]]] if j == i + 1 else []
+        else:
+            k, b, c = bp
+            t1, t2 = Tree(cg.symbols[b], []), Tree(cg.symbols[c], [])
+            t.branches = [t1, t2]
+            stack.append((t1, b, i, k))
+            stack.append((t2, c, k, j))
+    return T[0, len(u)][cg.axiom][0], gr.untransform(root)
 
 
 "Check that the grammar is in Chomsky Normal Form"
 def checkCNF(gr):
     for r in gr.rules:
-        if (len(r.rhs) == 2) and (r.rhs[0].name.islower() or r.rhs[1].name.islower()):    # if a binary rule contains terminal symbols
+        if (len(r.rhs) == 2) and not (gr.isNonTerminal(r.rhs[0]) and gr.isNonTerminal(r.rhs[1])):    # if a binary rule contains terminal symbols
             return False
-        if (len(r.rhs) == 1) and (r.rhs[0].name.isupper()):    # if a unary rule generates a non terminal
+        if (len(r.rhs) == 1) and gr.isNonTerminal(r.rhs[0]):    # if a unary rule generates a non terminal
             return False
-        if ((len(r.rhs) == 0) and (r.lhs.name != "S")): # if epsilon is generated by a symbol other than S
+        if (len(r.rhs) == 0) and (r.lhs != gr.axiom): # if epsilon is generated by a symbol other than S
+            return False
+        if (len(r.rhs) == 0) and any(gr.axiom in r2.rhs for r2 in gr.rules): # S -> ε is only allowed if S is in no right hand side
             return False
         if (len(r.rhs) > 2):
             return False
     return True
 
 
-"Global parsing function"
-def parse(u, gr):
-    print("--- \"" + u + "\" - " + gr.name + " ---")
+"Returns the word u as it is displayed (a list of tokens is written with spaces between the tokens)"
+
+def showWord(u):
+    return u if isinstance(u, str) else " ".join(u)
+
+
+"Global parsing function for a weighted grammar: display the best tree and its score"
+def parseViterbi(u, gr, beam=None, threshold=None):
+    print("--- \"" + showWord(u) + "\" - " + gr.name + " (Viterbi) ---")
+
+    if not checkCNF(gr):
+        gr = gr.toCNF()
+
+    best = viterbiTree(buildViterbiTable(u, gr, beam, threshold), u, gr)
+    if best is not None:
+        print("The best tree has the score " + str(best[0]))
+        print("")
+        print(str(best[1]))
+    else:
+        print("The word is NOT generated by the grammar")
+
+
+"Global parsing function (with trees=False, only one tree is built, from the table of bitsets)"
+"A grammar which is not in CNF is converted first, and the trees are given with its own rules"
+def parse(u, gr, trees=True):
+    print("--- \"" + showWord(u) + "\" - " + gr.name + " ---")
 
     if not checkCNF(gr):
-        print("The grammar is not in Chomsky Normal Form !")
+        print("The grammar is not in Chomsky Normal Form, it is converted to:")
+        gr = gr.toCNF()
+        print(gr)
+
+    if not trees:
+        T, back = buildBitTable(u, gr)
+
+        print("Analysis table :")
+        printBits(T, len(u), gr)
+        print("")
+
+        if isSuccessBits(T, u, gr):
+            print("The word is generated by the grammar")
+            print("")
+
+            print(str(bitTree(T, back, u, gr)))
+        else:
+            print("The word is NOT generated by the grammar")
         return
 
     T = buildTable(u, gr)
@@ -299,17 +628,18 @@ def parse(u, gr):
         print("The word is NOT generated by the grammar")
 
 
-parse("abab", g1)
-print("")
+if __name__ == "__main__":
+    parse("abab", g1)
+    print("")
 
-parse("abb", g1)
-print("")
+    parse("abb", g1)
+    print("")
 
-parse("aaab", g2)
-print("")
+    parse("aaab", g2)
+    print("")
 
-parse("ab", g2)
-print("")
+    parse("ab", g2)
+    print("")
 
 
 "Parse the word abaca with the ambiguous grammar.  Two parsing trees should be displayed"
@@ -335,4 +665,13 @@ g3 = Grammar(
     "g3"
 )
 
-parse("abaca", g3)
+if __name__ == "__main__":
+    parse("abaca", g3)
+    print("")
+
+    "The same word, only recognized: one tree is rebuilt from the backpointers"
+    parse("abaca", g3, False)
+    print("")
+
+    "The same word again, only keeping the best tree (all the rules of g3 have the weight 0, so the first one found)"
+    parseViterbi("abaca", g3)
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Vectorised version of the CYK recognizer (requires NumPy)
+#
+# The table is a boolean array T of shape (n+1, n+1, |N|): T[i, j, A] is True if
+# A -->* u[i] ... u[j-1]. The binary rules are a boolean tensor R of shape
+# (|N|, |N|, |N|): R[B, C, A] is True if A -> BC is a rule. All the cells of one
+# span length l are computed at once:
+#   P[i, B, C] = number of splits k such that B ∈ T[i,k] and C ∈ T[k,i+l]
+#   T[i, i+l, A] = (P[i] . R)[A] > 0
+# so the loops on the beginning, the splits and the rules are done by NumPy.
+# The non-terminals are numbered from 0 to |N|-1 (ntIndex of the compiled grammar),
+# so the sizes do not depend on the number of terminals: the rules A -> a are kept
+# as one row of |N| booleans per terminal a that has such rules.
+# ----------------------------------------------------------------------------------
+
+import weakref
+
+import numpy as np
+
+
+# rule tensors already built, by compiled grammar (they are dropped with the grammar)
+tensors = weakref.WeakKeyDictionary()
+
+
+"Returns the tensors of the compiled grammar cg: the binary rules as a (|N|*|N|, |N|) matrix and the rules A -> a"
+"as a dictionary terminal id -> row of |N| booleans (only for the terminals of such rules)"
+
+def ruleTensors(cg):
+    if cg not in tensors:
+        N = len(cg.nonTerminals)
+        nt = cg.ntIndex
+        binary = np.zeros((N, N, N), dtype=np.float32)     # binary[B, C, A]: rule A -> BC
+        lexical = {}                                        # lexical[a][A]: rule A -> a
+        for a, rhs in cg.rules:
+            if len(rhs) == 2:
+                binary[nt[rhs[0]], nt[rhs[1]], nt[a]] = 1
+            elif len(rhs) == 1:
+                if rhs[0] not in lexical:
+                    lexical[rhs[0]] = np.zeros(N, dtype=bool)
+                lexical[rhs[0]][nt[a]] = True
+        tensors[cg] = (binary.reshape(N * N, N), lexical)
+    return tensors[cg]
+
+
+"Creation of the boolean analysis table of the word u for the grammar gr"
+
+def buildTableNumpy(u, gr):
+    # u: word to parse (String or list of String tokens)
+    # gr: Grammar
+    cg = gr.compile()   # integer tables of the grammar
+    w = cg.encode(u)    # the word as a list of terminal ids
+    n = len(u)
+    N = len(cg.nonTerminals)
+    binary, lexical = ruleTensors(cg)
+
+    T = np.zeros((n + 1, n + 1, N), dtype=bool)
+    # initialization of the diagonal with the rules A -> a
+    for i in range(n):
+        if w[i] in lexical:
+            T[i, i+1] = lexical[w[i]]
+    # the empty word is only generated by the rule S -> ε
+    if n == 0 and (cg.axiom, ()) in cg.rules:
+        T[0, 0, cg.ntIndex[cg.axiom]] = True
+
+    for l in range(2, n+1):   # loop on the length of span
+        m = n - l + 1                           # number of cells of length l
+        starts = np.arange(m)[None, :]          # i, for every cell
+        splits = np.arange(1, l)[:, None]       # k - i, for every split
+        left = T[starts, starts + splits].astype(np.float32)         # left[d, i, B]: B ∈ T[i, i+d]
+        right = T[starts + splits, starts + l].astype(np.float32)    # right[d, i, C]: C ∈ T[i+d, i+l]
+        pairs = np.einsum('dib,dic->ibc', left, right)               # pairs[i, B, C]
+        T[starts[0], starts[0] + l] = (pairs.reshape(m, N * N) @ binary) > 0
+
+    return T
+
+
+"Once the table T is filled, determine if the analysis was successful"
+
+def isSuccessNumpy(T, u, gr):
+    cg = gr.compile()
+    # an axiom without rules is not a non-terminal, and generates nothing
+    return cg.axiom in cg.ntIndex and bool(T[0, len(u), cg.ntIndex[cg.axiom]])
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Wavefront-parallel version of the CYK recognizer
+#
+# All the cells of the same span length l only depend on shorter spans, so each
+# anti-diagonal of the table can be split between several processes. Every worker
+# keeps its own copy of the table of bitsets (see CONTI_CYK.buildBitTable): for each
+# diagonal the parent sends to every worker the cells of the previous diagonal and
+# the range of beginnings it has to compute, then waits for all of them (barrier)
+# before going on with the next diagonal. Only O(n) bitsets are sent per diagonal
+# and per worker, instead of the O(n²) cells a cell of the diagonal depends on.
+#
+# Below a given word length, or for diagonals with too few cells, the work is done
+# by the parent alone since starting and feeding the processes would cost more.
+# ----------------------------------------------------------------------------------
+
+import os
+from multiprocessing import Pipe, Process
+
+import CONTI_CYK
+
+
+# Main function of a worker: receives (cells of the last diagonal, l, lo, hi) and answers
+# with the bitsets of the cells T[i, i+l] for lo <= i < hi and their backpointers, until it receives None
+def worker(conn, cg):
+    # conn: Connection (to the parent)
+    # cg: CompiledGrammar
+    T = {}  # the worker's copy of the table
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        cells, l, lo, hi = msg
+        T.update(cells)
+        back = {}
+        bits = [CONTI_CYK.bitCell(T, back, i, i+l, cg) for i in range(lo, hi)]
+        conn.send((bits, back))
+    conn.close()
+
+
+"Creation of the table of bitsets of the word u for the grammar gr, computing each diagonal with several processes"
+
+def buildBitTableParallel(u, gr, workers=None, threshold=256, minCells=64):
+    # u: word to parse (String or list of String tokens)
+    # gr: Grammar
+    # workers: Integer (number of processes, all the processors if None)
+    # threshold: Integer (words shorter than this are parsed by CONTI_CYK.buildBitTable)
+    # minCells: Integer (diagonals with less cells than this are computed by the parent)
+    # returns (T, back) as CONTI_CYK.buildBitTable does
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    n = len(u)
+    if n < threshold or workers <= 1:
+        return CONTI_CYK.buildBitTable(u, gr)
+
+    cg = gr.compile()   # integer tables of the grammar
+    T = CONTI_CYK.initBits(u, gr)
+    back = {}
+
+    conns = []      # pipes to the workers
+    processes = []
+    for p in range(workers):
+        parent, child = Pipe()
+        process = Process(target=worker, args=(child, cg), daemon=True)
+        process.start()
+        child.close()
+        conns.append(parent)
+        processes.append(process)
+
+    finished = False    # True once the table is complete, False if an error stopped the loop
+    try:
+        cells = dict(T)     # cells the workers do not have yet
+        for l in range(2, n+1):   # loop on the length of span
+            m = n - l + 1   # number of cells of the diagonal
+            if m < minCells:
+                for i in range(m):
+                    T[i, i+l] = CONTI_CYK.bitCell(T, back, i, i+l, cg)
+                    cells[i, i+l] = T[i, i+l]
+                continue
+
+            # contiguous ranges of beginnings, of nearly the same size
+            bounds = [m * p // workers for p in range(workers + 1)]
+            for p in range(workers):
+                conns[p].send((cells, l, bounds[p], bounds[p+1]))
+            cells = {}
+            # barrier: the next diagonal needs all the cells of this one
+            for p in range(workers):
+                bits, workerBack = conns[p].recv()
+                for i, b in enumerate(bits, bounds[p]):
+                    T[i, i+l] = b
+                    cells[i, i+l] = b
+                back.update(workerBack)
+        finished = True
+    finally:
+        for conn in conns:
+            try:
+                conn.send(None)
+            except OSError:
+                # the worker is dead (BrokenPipeError), the error which stopped the loop is the one raised
+                pass
+            conn.close()
+        for process in processes:
+            if not finished:
+                # a worker may be waiting for the pipe, it would never see the None
+                process.terminate()
+            process.join()
+
+    return T, back
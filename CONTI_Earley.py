@@ -19,136 +19,96 @@
 
 
 
-class Symbol:
-    # field name: String
-    # (no methods)
+import time
 
-    def __init__(self, name):
-        # name: String
+from CONTI_Grammar import Symbol, Rule, Grammar
+from CONTI_Stats import count_table
+from CONTI_Trace import PrintTracer
 
-        self.name = name
 
-    def __str__(self):
-        return self.name
-
-
-class Rule:
-    # field lhs: Symbol
-    # field rhs: list of Symbol
-    # (no methods)
-
-    def __init__(self, lhs, rhs):
-        # lhs: Symbol
-        # rhs: list of Symbol
-
-        self.lhs = lhs
-        self.rhs = rhs
-
-    def __str__(self):
-        return str(self.lhs) + " --> [" + ",".join([str(s) for s in self.rhs]) + "]"
-
-
-class Grammar:
-    # field symbols: list of Symbol
-    # field axiom: Symbol
-    # field rules: list of Rule
-    # field nonTerminals: set of Symbol
-    # field name: String
-    # method createNewSymbol: String -> Symbol
-    # method isNonTerminal: Symbol -> Boolean
-
-    def __init__(self, symbols, axiom, rules, name):
-        # symbols: list of Symbol
-        # axiom: Symbol
-        # rules: list of Rule
-        # name: String
-
-        self.symbols = symbols
-        self.axiom = axiom
-        self.rules = rules
-        self.name = name
-
-        self.nonTerminals = set()
-        for rule in rules:
-            self.nonTerminals.add(rule.lhs)
-
-    # Returns a new symbol (with a new name build from the argument)
-    def createNewSymbol(self, symbolName):
-        # symbolName: String
-
-        name = symbolName
-
-        ok = False
-        while (ok == False):
-            ok = True
-            for s in self.symbols:
-                if s.name == name:
-                    ok = False
-                    continue
-
-            if ok == False:
-                name = name + "'"
-
-        return Symbol(name)
-
-    def isNonTerminal(self, symbol):
-        # symbol: Symbol
+class Item:
+    # An item (A -> α•β, i) is only the number of the rule A -> αβ, the position of the dot and i:
+    # the symbols before and after the dot are read in the rule when needed, never copied
+    # field rule: Integer (number of the rule in the compiled grammar)
+    # field dot: Integer (position of the dot in the right hand side of the rule)
+    # field i: Integer
+    # method lhs, bd, ad: CompiledGrammar -> Integer, tuple of Integer, tuple of Integer (only used to print the item)
+    # method show: CompiledGrammar -> String
 
-        return symbol in self.nonTerminals
+    __slots__ = ("rule", "dot", "i")
 
-    def __str__(self):
-        return "{" + \
-               "symbols = [" + ",".join([str(s) for s in self.symbols]) + "] " + \
-               "axiom = " + str(self.axiom) + " " + \
-               "rules = [" + ", ".join(str(r) for r in self.rules) + "]" + \
-               "}"
+    def __init__(self, i, rule, dot):  # [i,lhs --> bd•ad]
+        self.rule = rule
+        self.dot = dot
+        self.i = i
 
+    # Returns the left hand side of the rule
+    def lhs(self, cg):
+        return cg.rules[self.rule][0]
 
-class Item:
-    # field lhs: Symbol
-    # field bd (before dot): list of Symbol
-    # field ad (after dot): list of Symbol
-    # field i: Integer
+    # Returns the symbols before the dot
+    def bd(self, cg):
+        return cg.rules[self.rule][1][:self.dot]
 
-    def __init__(self, i, lhs, bd, ad):  # [i,lhs --> bd•ad]
-        self.lhs = lhs
-        self.bd = bd
-        self.ad = ad
-        self.i = i
+    # Returns the symbols after the dot
+    def ad(self, cg):
+        return cg.rules[self.rule][1][self.dot:]
 
-    def __str__(self):
+    # Returns the item written with the names of its symbols
+    def show(self, cg):
+        # cg: CompiledGrammar
         return "[%d,%s --> %s • %s]" % \
-               (self.i, str(self.lhs), ",".join([str(s) for s in self.bd]), ",".join([str(s) for s in self.ad]))
+               (self.i, str(cg.symbols[self.lhs(cg)]), ",".join([str(cg.symbols[s]) for s in self.bd(cg)]), ",".join([str(cg.symbols[s]) for s in self.ad(cg)]))
 
+    # two items are equal if they have the same rule, dot and i
     def __eq__(self, other):
-        return self.i == other.i and \
-               self.lhs == other.lhs and self.bd == other.bd and self.ad == other.ad
+        return self.rule == other.rule and self.dot == other.dot and self.i == other.i
+
+    def __hash__(self):
+        return hash((self.rule, self.dot, self.i))
 
 class TableCell:
-    # field c: list of Item
+    # field c: list of Item (in the order they were added)
+    # field keys: set of (rule, dot, i) of the items of c (to know in constant time if an item is already in c)
+    # field predicted: set of Integer (the non-terminals already predicted in this cell)
+    # field waiting: dictionary Integer -> list of Item (symbol X -> the items of c of the form (A -> α•Xβ, i))
+    # field g: CompiledGrammar (the grammar of the items)
+    # field j: Integer (index of the cell in the table, only used by the tracers)
+    # field duplicates: Integer (number of items not added because they were already in c, only read by count_table)
+    # field leo: dictionary Integer -> (Integer, Integer, Integer) or None (symbol B -> the topmost item (rule, dot, i)
+        # of the deterministic chain of completions of B in this cell, None if there is no such chain, see leo_item)
     # method cAppend: add Item to table cell
 
 
     c = []  # cell
 
-    def __init__(self):
+    def __init__(self, g, j):
         self.c = []
+        self.keys = set()
+        self.predicted = set()
+        self.waiting = {}
+        self.g = g
+        self.j = j
+        self.leo = {}
+        self.duplicates = 0
 
     def __str__(self):
-        return "{" + ", ".join([str(item) for item in self.c]) + "}"
-
-    # Adds an item at the end of the t (+ prints some log), argument reason indicates the name of operations:"init","pred","scan","comp"
-    # Argument print_log indicates whether to print log information or not
-    def cAppend(self, item, print_log, reason=None):
-        if reason != None:
-            reasonStr =  reason + ": "
-        else:
-            reasonStr = ""
-
-        if item not in self.c:
+        return "{" + ", ".join([item.show(self.g) for item in self.c]) + "}"
+
+    # Adds an item at the end of the t (+ traces it), argument event indicates the name of operations:"init","pred","scan","comp"
+    # Argument tracer is the tracer of the parse (see CONTI_Trace), None if nothing is traced
+    def cAppend(self, item, tracer, event=None):
+        key = (item.rule, item.dot, item.i)
+        if key not in self.keys:
+            self.keys.add(key)
             self.c.append(item)
-            if print_log:
-                print(reasonStr+ str(item) )
+            rhs = self.g.rules[item.rule][1]
+            if item.dot < len(rhs):
+                self.waiting.setdefault(rhs[item.dot], []).append(item)
+            if tracer is not None:
+                tracer.trace(event, self.j, item, self.g)
+        else:
+            self.duplicates += 1
 
     # Returns the item in position i of the TableCell
     def cGet(self, i):
@@ -161,114 +121,198 @@ class TableCell:
 # ------------------------
 
 # Creation and initialisation of the table T for the word w and the grammar gr
-def init(g, w, print_log):
+def init(g, w, tracer):
     # g: Grammar
     # w: word
-    # print_log: boolean that indicates whether to print log information or not
+    # tracer: Tracer (see CONTI_Trace), None if nothing is traced
+
+    # cg: integer tables of the grammar
+    cg = g.compile()
 
     #T is a dictionary
     T = {}
 
     # makes T a dictionary with keys in len(w) and empty TableCells (ordered sets) as values
     for j in range(len(w) + 1):
-        T[j] = TableCell()
+        T[j] = TableCell(cg, j)
 
     # foreach S -> α in P, add (S -> .α, 0) to T[0]
-    for r in g.rules:
-        if str(r.lhs) == str(g.axiom):
-            T.get(0).cAppend(Item(0, r.lhs, [], r.rhs), print_log, "init, add to cell " + str(0))
+    a = cg.axiom
+    for r in cg.rulesByLhs[a]:
+        T.get(0).cAppend(Item(0, r, 0), tracer, "init")
 
     return T
 
 
 # Insert in the table any new items resulting from the pred operation for the iterm it
-def pred(g, it, T, j, print_log):
+def pred(g, it, T, j, tracer, lookahead=None):
     # g: Grammar
     # it: Item (A -> α . β, i)
     # T: table
     # j : index
-    # print_log: boolean that indicates whether to print log information or not
+    # tracer: Tracer (see CONTI_Trace), None if nothing is traced
+    # lookahead: Integer (id of the letter w[j], -1 after the end of the word), None to predict without looking at it
+
+    cg = g.compile()
+    nxt = cg.rules[it.rule][1][it.dot]  # β1
+
+    # if β1 -->* ε, add (A -> αβ1•β2, i) to T[j] at once (Aycock and Horspool): the completion
+    # of β1 in T[j] may already have been done, before it was waiting for it
+    if cg.nullable[nxt]:
+        T.get(j).cAppend(Item(it.i, it.rule, it.dot + 1), tracer, "pred")
 
     # foreach β1 -> γ in P, add (β1 -> .γ, j) to T[j]
-    for r in g.rules:
-        if str(r.lhs) == str(it.ad[0]):
-            T.get(j).cAppend(Item(j, r.lhs, [], r.rhs), print_log, "pred, add to cell " + str(j))
+    # (only once per cell: the items are the same for all the items waiting for β1)
+    # with the lookahead, only the rules where γ can begin with w[j] (or give ε) are predicted,
+    # the other items could never be scanned
+    if nxt in T.get(j).predicted:
+        return
+    T.get(j).predicted.add(nxt)
+    if lookahead is None:
+        rules = cg.rulesByLhs[nxt]
+    else:
+        rules = cg.rulesStartingWith(nxt, lookahead) + cg.emptyRules[nxt]
+    for r in rules:
+        T.get(j).cAppend(Item(j, r, 0), tracer, "pred")
 
 
-# Insert in the table any new items resulting from the scan operation for the item it
-def scan(it, T, j, w, print_log):
-    # it: Item (A -> α . β, i)
+# Insert in the table any new items resulting from the scan operation for the items of T[j] when the letter a is read
+def scan(T, j, a, tracer):
     # T: table
     # j: index
-    # w: word
-    # print_log: boolean that indicates whether to print log information or not
-
-    # if β1 = uj then add (A -> αβ1•β2:|β|, i) to T[j +1]
-    if str(it.ad[0]) == str(w[j]):
-        T.get(j+1).cAppend(Item(it.i, it.lhs, it.bd + [it.ad[0]], it.ad[1:]), print_log, "scan, add to cell " + str(j+1))
+    # a: Integer (id of the terminal w[j], -1 if it is not a terminal of the grammar)
+    # tracer: Tracer (see CONTI_Trace), None if nothing is traced
+
+    # for all (A -> α•β1β2, i) in T[j] with β1 = uj, add (A -> αβ1•β2:|β|, i) to T[j +1]
+    # (they are the items of T[j] waiting for β1)
+    for it in T.get(j).waiting.get(a, []):
+        T.get(j+1).cAppend(Item(it.i, it.rule, it.dot + 1), tracer, "scan")
+
+
+# Return the topmost item of the deterministic chain of completions (Leo) that starts when B is
+# completed in T[i], for i smaller than the current column. The chain exists when T[i] contains a
+# single item waiting for B and this item is (A -> α•B, k): completing B in T[i] then only completes
+# A in T[k], and so on. Instead of adding every item of the chain to the current column (a quadratic
+# number of items for right recursive rules), only the topmost one is added. The results are kept
+# in the field leo of the cells, so each chain is only followed once. The chain is stopped at the
+# items starting in T[0], which are always added, so that the successful items are in the last cell.
+def leo_item(T, i, B):
+    # T: table
+    # i: index (of a cell already completed)
+    # B: Integer (the completed symbol)
+
+    cg = T.get(i).g
+    path = []  # (cell, symbol, item (A -> α•B, k)) of the chain not yet in the field leo
+    seen = set()  # (index, symbol) of the chain
+    top = None  # topmost item of the part of the chain already known
+    while True:
+        cell = T.get(i)
+        if B in cell.leo:
+            top = cell.leo[B]
+            break
+        waiting = cell.waiting.get(B, [])
+        if len(waiting) != 1 or waiting[0].dot != len(cg.rules[waiting[0].rule][1]) - 1 or (i, B) in seen:
+            # no chain here (or a cycle of unit rules): the items are completed one by one
+            if (i, B) in seen:
+                path = [(c, s, None) for (c, s, x) in path]
+            cell.leo[B] = None
+            break
+        seen.add((i, B))
+        x = waiting[0]
+        path.append((cell, B, x))
+        if x.i == 0:
+            break
+        i, B = x.i, cg.rules[x.rule][0]
+
+    for cell, B, x in reversed(path):
+        if x is None:
+            top = None
+        elif top is None:
+            top = (x.rule, x.dot + 1, x.i)
+        cell.leo[B] = top
+    return top
 
 
 # Insert in the table any possible new items resulting from the comp operation for the item it
-def comp(it,T,j, print_log):
+def comp(it,T,j, tracer):
     # it: Item (A -> α . β, i)
     # T: table
     # j: index
-    # print_log: boolean that indicates whether to print log information or not
-
-    k_prime = 0 # k_prime loops through T[i]
-    while k_prime < T.get(it.i).cLen():
-        # it_prime: Item (i', A′ -> α′•β′) in T[i][k′]
-        it_prime = T.get(it.i).cGet(k_prime)
-        # if β′1 =A then add((A′ -> α′β′1•β′2:|β′|, i′) to T[j]
-        if it_prime.ad: # to avoid index out of range
-            if str(it_prime.ad[0]) == str(it.lhs):
-                T.get(j).cAppend(Item(it_prime.i, it_prime.lhs, it_prime.bd + [it_prime.ad[0]], it_prime.ad[1:]), print_log, "comp, add to cell " + str(j))
+    # tracer: Tracer (see CONTI_Trace), None if nothing is traced
+
+    cg = T.get(j).g
+    lhs = cg.rules[it.rule][0]  # A
+    # if T[i] is completed and has a deterministic chain for A, only its topmost item is added
+    if it.i < j:
+        top = leo_item(T, it.i, lhs)
+        if top is not None:
+            rule, dot, i = top
+            T.get(j).cAppend(Item(i, rule, dot), tracer, "comp")
+            return
+    # only the items of T[i] waiting for A are looked at (the list can grow during the loop if i = j)
+    waiting = T.get(it.i).waiting.get(lhs, [])
+    k_prime = 0 # k_prime loops through the items of T[i] waiting for A
+    while k_prime < len(waiting):
+        # it_prime: Item (i', A′ -> α′•Aβ′) in T[i]
+        it_prime = waiting[k_prime]
+        # add (A′ -> α′A•β′:|β′|, i′) to T[j]
+        T.get(j).cAppend(Item(it_prime.i, it_prime.rule, it_prime.dot + 1), tracer, "comp")
         k_prime += 1
 
 
+# Apply pred and comp to the items of T[j] (and to those they add) until nothing more can be added to T[j]:
+# T[j] then holds all the items it can have, scan can be done for the next letter
+def close_column(g, T, j, tracer, lookahead=None):
+    # g: Grammar
+    # T: table
+    # j: index
+    # tracer: Tracer (see CONTI_Trace), None if nothing is traced
+    # lookahead: Integer (id of the letter w[j], -1 after the end of the word), None to predict without looking at it
+
+    cg = g.compile()
+    if tracer is not None:
+        tracer.trace("column", j, None, cg)
+    k = 0  # k loops through T[j]
+    while k < T.get(j).cLen():
+        item = T.get(j).cGet(k)    # we will be working with the item in T[j][k]: (A -> α•β,i)
+        rhs = cg.rules[item.rule][1]
+        if item.dot == len(rhs):   # if β = ε
+            # comp?
+            comp(item, T, j, tracer)
+        elif cg.nonTerminal[rhs[item.dot]]: # if β1 ∈ N
+            # pred?
+            pred(g, item, T, j, tracer, lookahead)
+        k += 1
+
+
 # Return True if the analysis is successful, otherwise False
 def table_complete(g, w, T):
     # g: Grammar
     # w: word
     # T: table
 
+    cg = g.compile()
     # for all items in T[|u|]
     for i in range(T.get(len(w)).cLen()):
         it = T.get(len(w)).cGet(i)
         # if the item is of form (S -> α•, 0) then the analysis is successful
-        if (it.i == 0) and (str(it.lhs) == str(g.axiom)) and (not it.ad):
+        if (it.i == 0) and (cg.rules[it.rule][0] == cg.axiom) and (it.dot == len(cg.rules[it.rule][1])):
             return True
     return False
 
 
 # Parse the word w for the grammar g return the parsing table at the end of the algorithm
-def parse_earley(g, w, print_log):
+def parse_earley(g, w, print_log, tracer=None, lookahead=False, stats=None):
     # g: Grammar
     # w: word
     # print_log: boolean that indicates whether to print log information or not
+    # tracer: Tracer (see CONTI_Trace) receiving the events instead of printing them, None by default
+    # lookahead: boolean that indicates whether to only predict the rules that can begin with the next letter
+    # stats: ParseStats (see CONTI_Stats) filled by the parse, None if nothing is counted
 
-
-    # Initialisation
-    T = init(g,w, print_log)
-
-    # Top-down analysis
-    for j in range(len(w) + 1): # j loops through T
-        if print_log:
-            print("j = " +str(j))
-        k = 0  # k loops through T[j]
-        while k < T.get(j).cLen():
-            item = T.get(j).cGet(k)    # we will be working with the item in T[j][k]: (A -> α•β,i)
-            if item.ad == []:   # if β = ε
-                # comp?
-                comp(item, T, j, print_log)
-            elif g.isNonTerminal(item.ad[0]): # if β1 ∈ N
-                # pred?
-                pred(g, item, T, j, print_log)
-            elif j < len(w):
-                # scan?
-                scan(item, T, j, w, print_log)
-            k += 1
-
+    if print_log and tracer is None:
+        tracer = PrintTracer()
+    T = build_earley_table(g, w, tracer, lookahead, stats)
 
     if table_complete(g, w, T):
         print("Success")
@@ -277,6 +321,92 @@ def parse_earley(g, w, print_log):
 
     return T
 
+
+# Fill the parsing table of the word w for the grammar g (without printing the result) and return it
+def build_earley_table(g, w, tracer=None, lookahead=False, stats=None):
+    # g: Grammar
+    # w: word
+    # tracer: Tracer (see CONTI_Trace), None if nothing is traced
+    # lookahead: boolean that indicates whether to only predict the rules that can begin with the next letter
+    # stats: ParseStats (see CONTI_Stats) filled by the parse, None if nothing is counted
+
+    # cg: integer tables of the grammar, wid: the word as a list of terminal ids
+    cg = g.compile()
+    wid = cg.encode(w)
+
+    # Initialisation
+    start = time.perf_counter()
+    T = init(g,w, tracer)
+    times = {"init": time.perf_counter() - start, "close": 0.0, "scan": 0.0}  # time spent in each phase
+
+    # Top-down analysis
+    for j in range(len(w) + 1): # j loops through T
+        start = time.perf_counter()
+        close_column(g, T, j, tracer, (wid[j] if j < len(w) else -1) if lookahead else None)
+        times["close"] += time.perf_counter() - start
+        if j < len(w):
+            start = time.perf_counter()
+            scan(T, j, wid[j], tracer)
+            times["scan"] += time.perf_counter() - start
+            # if no item could read w[j], the next cells stay empty: the analysis has already failed
+            if T.get(j+1).cLen() == 0:
+                break
+
+    if stats is not None:
+        stats.times = times
+        count_table(g, w, T, stats)
+    return T
+
+
+class EarleyParser:
+    # Earley parser that reads the word one token at a time: after each token, the table holds the
+    # cells of the prefix read so far, so it is known at once whether this prefix can still be
+    # completed into a word of the language. Once a cell is empty, the next tokens are not even looked at.
+    # (No lookahead here: a cell is closed before the next token is known.)
+    # field g: Grammar
+    # field w: list of String (tokens read so far)
+    # field T: table (the cells T[0] ... T[|w|] of the prefix, all closed by close_column)
+    # field tracer: Tracer (see CONTI_Trace), None if nothing is traced
+    # method feed: String -> Boolean (reads one more token, returns is_viable_prefix())
+    # method is_viable_prefix: -> Boolean
+    # method expected_terminals: -> set of String
+    # method accepts: -> Boolean
+
+    def __init__(self, g, tracer=None):
+        # g: Grammar
+        self.g = g
+        self.w = []
+        self.tracer = tracer
+        self.T = init(g, self.w, tracer)
+        close_column(g, self.T, 0, tracer)
+
+    # Adds the token at the end of the prefix, scans it and closes the new cell
+    def feed(self, token):
+        # token: String (a terminal of the grammar)
+        if not self.is_viable_prefix():
+            return False
+        cg = self.g.compile()
+        j = len(self.w)
+        self.w.append(token)
+        self.T[j+1] = TableCell(cg, j+1)
+        scan(self.T, j, cg.encode([token])[0], self.tracer)
+        close_column(self.g, self.T, j+1, self.tracer)
+        return self.is_viable_prefix()
+
+    # Returns True if the tokens read so far are the beginning of a word of the language
+    # (if every symbol of the grammar generates some word), that is if the last cell is not empty
+    def is_viable_prefix(self):
+        return self.T.get(len(self.w)).cLen() > 0
+
+    # Returns the terminals that can be read next (the empty set if the prefix is not viable)
+    def expected_terminals(self):
+        cg = self.g.compile()
+        return {cg.symbols[a].name for a in self.T.get(len(self.w)).waiting if not cg.nonTerminal[a]}
+
+    # Returns True if the tokens read so far form a word of the language
+    def accepts(self):
+        return table_complete(self.g, self.w, self.T)
+
 # --------------
 # Definition of the symbols
 symS = Symbol("S")
@@ -350,34 +480,35 @@ g3 = Grammar(
 )
 
 # --------------
-words = ["aab", "b", "aaaaab", "abab"]
+if __name__ == "__main__":
+    words = ["aab", "b", "aaaaab", "abab"]
 
-print("GRAMMAR 1:")
-print(g1)
-print()
-for word in words:
-    print("Is the word " + word + " generated by g1?")
-    parse_earley(g1, word, False)
+    print("GRAMMAR 1:")
+    print(g1)
     print()
+    for word in words:
+        print("Is the word " + word + " generated by g1?")
+        parse_earley(g1, word, False)
+        print()
 
 
-print("GRAMMAR 2:")
-print(g2)
-print()
-for word in words:
-    print("Is the word " + word + " generated by g2?")
-    parse_earley(g2, word, False)
+    print("GRAMMAR 2:")
+    print(g2)
     print()
+    for word in words:
+        print("Is the word " + word + " generated by g2?")
+        parse_earley(g2, word, False)
+        print()
 
 
 
-print("GRAMMAR 3:")
-print(g3)
-print()
-for word in words:
-    print("Is the word " + word + " generated by g3?")
-    parse_earley(g3, word, False)
+    print("GRAMMAR 3:")
+    print(g3)
     print()
+    for word in words:
+        print("Is the word " + word + " generated by g3?")
+        parse_earley(g3, word, False)
+        print()
 
 
 
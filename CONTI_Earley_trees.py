@@ -19,89 +19,13 @@
 
 
 
-class Symbol:
-    # field name: String
-    # (no methods)
-
-    def __init__(self, name):
-        # name: String
-
-        self.name = name
-
-    def __str__(self):
-        return self.name
-
-
-class Rule:
-    # field lhs: Symbol
-    # field rhs: list of Symbol
-    # (no methods)
-
-    def __init__(self, lhs, rhs):
-        # lhs: Symbol
-        # rhs: list of Symbol
-
-        self.lhs = lhs
-        self.rhs = rhs
-
-    def __str__(self):
-        return str(self.lhs) + " --> [" + ",".join([str(s) for s in self.rhs]) + "]"
-
-
-class Grammar:
-    # field symbols: list of Symbol
-    # field axiom: Symbol
-    # field rules: list of Rule
-    # field nonTerminals: set of Symbol
-    # field name: String
-    # method createNewSymbol: String -> Symbol
-    # method isNonTerminal: Symbol -> Boolean
-
-    def __init__(self, symbols, axiom, rules, name):
-        # symbols: list of Symbol
-        # axiom: Symbol
-        # rules: list of Rule
-        # name: String
-
-        self.symbols = symbols
-        self.axiom = axiom
-        self.rules = rules
-        self.name = name
-
-        self.nonTerminals = set()
-        for rule in rules:
-            self.nonTerminals.add(rule.lhs)
-
-    # Returns a new symbol (with a new name build from the argument)
-    def createNewSymbol(self, symbolName):
-        # symbolName: String
-
-        name = symbolName
-
-        ok = False
-        while (ok == False):
-            ok = True
-            for s in self.symbols:
-                if s.name == name:
-                    ok = False
-                    continue
-
-            if ok == False:
-                name = name + "'"
-
-        return Symbol(name)
+import time
+from itertools import islice
 
-    def isNonTerminal(self, symbol):
-        # symbol: Symbol
+from CONTI_Grammar import Symbol, Rule, Grammar
+from CONTI_Stats import count_table
+from CONTI_Trace import PrintTracer
 
-        return symbol in self.nonTerminals
-
-    def __str__(self):
-        return "{" + \
-               "symbols = [" + ",".join([str(s) for s in self.symbols]) + "] " + \
-               "axiom = " + str(self.axiom) + " " + \
-               "rules = [" + ", ".join(str(r) for r in self.rules) + "]" + \
-               "}"
 
 class Tree:
     # field branches: list of branches (trees for non terminal symbols and symbols for terminal symbols)
@@ -116,54 +40,221 @@ class Tree:
         # working here! fix so it works also for grammars that are not in CNF
         return "[ " + self.label.name + ", " + ", ".join(str(b) for b in self.branches) + " ]"
 
-class Item:
-    # field lhs: Symbol
-    # field bd (before dot): list of Symbol
-    # field ad (after dot): list of Symbol
+class SymbolNode:
+    # All the derivations of the symbol `label` for the subword w[i] ... w[j-1], shared by all the
+    # items that use one of them (node of the shared packed parse forest, there is one node per
+    # (label, i, j), kept in the field nodes of T[j])
+    # field label: Symbol
     # field i: Integer
-    # field tree: Tree
-        # the tree is built as we move the dot along the rule
+    # field j: Integer
+    # field alternatives: list of Item (the completed items (label -> γ•, i) of T[j], one per rule that gives the node)
+    # method trees: frozenset of SymbolNode -> iterator of Tree
 
-    def __init__(self, i, lhs, bd, ad, tree):  # (i,lhs --> bd•ad)
-        self.lhs = lhs
-        self.bd = bd
-        self.ad = ad
+    def __init__(self, label, i, j, alternatives):
+        self.label = label
         self.i = i
-        self.tree = tree
+        self.j = j
+        self.alternatives = alternatives
+
+    # Yields the trees of the node one by one, only building a tree when it is asked for.
+    # path holds the nodes with the same span above this one: a node never appears below itself,
+    # so for cyclic grammars (A --> A) only the finitely many trees without such a cycle are given.
+    # A tree is given by the choices made to build it, in pre-order: at each node its alternative,
+    # then the link of each symbol of the item from the last one to the first one, then the
+    # subtrees from left to right. The next tree increments the last choice that is not exhausted,
+    # and a choice that puts a node below itself is skipped. An explicit stack is used, so that
+    # deep trees do not exceed the recursion limit.
+    def trees(self, path=frozenset()):
+        choices = []  # index of the alternative or link chosen at each choice point, in pre-order
+        while True:
+            counts = []  # number of alternatives or links of each choice point of the tree, in pre-order
+
+            # Returns the choice made at the next choice point, which has k possibilities
+            def choose(k):
+                if len(counts) == len(choices):
+                    # a choice point not reached by the previous tree: its first possibility
+                    choices.append(0)
+                counts.append(k)
+                return choices[len(counts) - 1]
+
+            root = Tree(self.label, [])
+            todo = [(self, path, root)]  # nodes whose tree is still to build, with their path
+            cyclic = False  # a node was put below itself
+            while todo and not cyclic:
+                node, above, tree = todo.pop()
+                above = above | {node}
+                it = node.alternatives[choose(len(node.alternatives))]
+                subtrees = []  # (node, path, tree) for each non-terminal, from right to left
+                while it.links:
+                    prev, child = it.links[choose(len(it.links))]
+                    if isinstance(child, Symbol):
+                        tree.branches.append(child)
+                    elif child in above:
+                        cyclic = True
+                        break
+                    else:
+                        if isinstance(child, LeoNode):
+                            child = child.build()
+                        # the nodes of a smaller span can not be above this one
+                        childPath = above if (child.i, child.j) == (node.i, node.j) else frozenset()
+                        tree.branches.append(Tree(child.label, []))
+                        subtrees.append((child, childPath, tree.branches[-1]))
+                    it = prev
+                tree.branches.reverse()
+                todo.extend(subtrees)
+            if not cyclic:
+                yield root
+            del choices[len(counts):]
+            while choices and choices[-1] + 1 == counts[len(choices) - 1]:
+                choices.pop()
+            if not choices:
+                return
+            choices[-1] += 1
+
+class LeoNode:
+    # Node of the symbol of the item just below the topmost item of a chain of completions
+    # skipped by leo_item: the nodes and items of the chain are only built (and then kept) when
+    # the trees are asked for, so skipping the chain stays cheap. It is used as a SymbolNode.
+    # field bottom: SymbolNode (node of the completed symbol at the bottom of the chain)
+    # field chain: linked list (Item (A -> α•B, k), rest of the chain), from the bottom to the top
+    # field g: CompiledGrammar
+    # field node: SymbolNode (None until it is built)
+    # method build: -> SymbolNode
+    # method trees: frozenset of SymbolNode -> iterator of Tree
+
+    def __init__(self, bottom, chain, g):
+        self.bottom = bottom
+        self.chain = chain
+        self.g = g
+        self.node = None
+
+    # Returns the node, building it if needed: each item of the chain but the topmost one gives a
+    # completed item whose node is the node of the item above
+    def build(self):
+        if self.node is None:
+            node = self.bottom
+            chain = self.chain
+            while chain[1] is not None:
+                x, chain = chain
+                completed = Item(x.i, x.rule, x.dot + 1, [(x, node)])
+                node = SymbolNode(self.g.symbols[self.g.rules[x.rule][0]], x.i, node.j, [completed])
+            self.node = node
+            self.bottom = self.chain = None
+        return self.node
+
+    @property
+    def i(self):
+        return self.build().i
+
+    @property
+    def j(self):
+        return self.build().j
+
+    def trees(self, path=frozenset()):
+        return self.build().trees(path)
 
-    def __str__(self):
+class Item:
+    # An item (A -> α•β, i) is only the number of the rule A -> αβ, the position of the dot and i:
+    # the symbols before and after the dot are read in the rule when needed, never copied
+    # field rule: Integer (number of the rule in the compiled grammar)
+    # field dot: Integer (position of the dot in the right hand side of the rule)
+    # field i: Integer
+    # field links: list of (Item, Symbol or SymbolNode)
+        # the derivations of α: each link is an item (A -> α'•X..., i) of a previous cell and the terminal
+        # or node read for X, so an item found again by another derivation only gets one more link
+        # (empty when the dot is at the beginning)
+    # method lhs, bd, ad: CompiledGrammar -> Integer, tuple of Integer, tuple of Integer (only used to print the item)
+    # method show: CompiledGrammar -> String
+
+    __slots__ = ("rule", "dot", "i", "links")
+
+    def __init__(self, i, rule, dot, links):  # [i,lhs --> bd•ad]
+        self.rule = rule
+        self.dot = dot
+        self.i = i
+        self.links = links
+
+    # Returns the left hand side of the rule
+    def lhs(self, cg):
+        return cg.rules[self.rule][0]
+
+    # Returns the symbols before the dot
+    def bd(self, cg):
+        return cg.rules[self.rule][1][:self.dot]
+
+    # Returns the symbols after the dot
+    def ad(self, cg):
+        return cg.rules[self.rule][1][self.dot:]
+
+    # Returns the item written with the names of its symbols
+    def show(self, cg):
+        # cg: CompiledGrammar
         return "[%d,%s --> %s • %s]" % \
-               (self.i, str(self.lhs), ",".join([str(s) for s in self.bd]), ",".join([str(s) for s in self.ad]))
+               (self.i, str(cg.symbols[self.lhs(cg)]), ",".join([str(cg.symbols[s]) for s in self.bd(cg)]), ",".join([str(cg.symbols[s]) for s in self.ad(cg)]))
 
+    # two items are equal if they have the same rule, dot and i
     def __eq__(self, other):
-        return self.i == other.i and \
-               self.lhs == other.lhs and self.bd == other.bd and self.ad == other.ad
+        return self.rule == other.rule and self.dot == other.dot and self.i == other.i
+
+    def __hash__(self):
+        return hash((self.rule, self.dot, self.i))
 
 class TableCell:
-    # field c: list of Item
+    # field c: list of Item (in the order they were added)
+    # field items: dictionary (rule, dot, i) -> Item (the items of c, to know in constant time if an item is already in c)
+    # field predicted: set of Integer (the non-terminals already predicted in this cell)
+    # field waiting: dictionary Integer -> list of Item (symbol X -> the items of c of the form (A -> α•Xβ, i))
+    # field nodes: dictionary (Integer, Integer) -> SymbolNode ((X, i) -> the node of X for w[i] ... w[j-1])
+    # field g: CompiledGrammar (the grammar of the items)
+    # field j: Integer (index of the cell in the table, only used by the tracers)
+    # field duplicates: Integer (number of items not added because they were already in c, only read by count_table)
+    # field leo: dictionary Integer -> (Item, chain) or None (symbol B -> the item (A′ -> α′•A″, i′) that gives the
+        # topmost item of the deterministic chain of completions of B in this cell and the chain itself, a linked
+        # list (item (A -> α•B, k), rest of the chain) up to this item, None if there is no such chain, see leo_item)
     # method cAppend: add Item to table cell
+    # method node: Integer * Integer -> SymbolNode
 
 
     c = []  # cell
 
-    def __init__(self):
+    def __init__(self, g, j):
         self.c = []
+        self.items = {}
+        self.predicted = set()
+        self.waiting = {}
+        self.nodes = {}
+        self.g = g
+        self.j = j
+        self.leo = {}
+        self.duplicates = 0
 
     def __str__(self):
-        return "{" + ", ".join([str(item) for item in self.c]) + "}"
-
-    # Adds an item at the end of the t (+ prints some log), argument reason indicates the name of operations:"init","pred","scan","comp"
-    # Argument print_log indicates whether to print log information or not
-    def cAppend(self, item, print_log, reason=None):
-        if reason != None:
-            reasonStr =  reason + ": "
-        else:
-            reasonStr = ""
-
-        if item not in self.c:
-            self.c.append(item)
-            if print_log:
-                print(reasonStr+ str(item) )
+        return "{" + ", ".join([item.show(self.g) for item in self.c]) + "}"
+
+    # Adds an item at the end of the t (+ traces it), argument event indicates the name of operations:"init","pred","scan","comp"
+    # If the item is already there, only its links are added to the links of the item of the cell
+    # Argument tracer is the tracer of the parse (see CONTI_Trace), None if nothing is traced
+    def cAppend(self, item, tracer, event=None):
+        key = (item.rule, item.dot, item.i)
+        if key in self.items:
+            self.items[key].links.extend(item.links)
+            self.duplicates += 1
+            return
+        self.items[key] = item
+        self.c.append(item)
+        rhs = self.g.rules[item.rule][1]
+        if item.dot < len(rhs):
+            self.waiting.setdefault(rhs[item.dot], []).append(item)
+        if tracer is not None:
+            tracer.trace(event, self.j, item, self.g)
+
+    # Returns the node of the symbol a for w[i] ... w[j-1], and True if it was just created
+    def node(self, a, i):
+        key = (a, i)
+        if key in self.nodes:
+            return self.nodes[key], False
+        self.nodes[key] = SymbolNode(self.g.symbols[a], i, self.j, [])
+        return self.nodes[key], True
 
     # Returns the item in position i of the TableCell
     def cGet(self, i):
@@ -176,68 +267,158 @@ class TableCell:
 # ------------------------
 
 # Creation and initialisation of the table T for the word w and the grammar gr
-def init(g, w, print_log):
+def init(g, w, tracer):
     # g: Grammar
     # w: word
-    # print_log: boolean that indicates whether to print log information or not
+    # tracer: Tracer (see CONTI_Trace), None if nothing is traced
+
+    # cg: integer tables of the grammar
+    cg = g.compile()
 
     #T is a dictionary
     T = {}
 
     # makes T a dictionary with keys in len(w) and empty TableCells (ordered sets) as values
     for j in range(len(w) + 1):
-        T[j] = TableCell()
+        T[j] = TableCell(cg, j)
 
     # foreach S -> α in P, add (S -> .α, 0) to T[0]
-    for r in g.rules:
-        if str(r.lhs) == str(g.axiom):
-            T.get(0).cAppend(Item(0, r.lhs, [], r.rhs, Tree(r.lhs, [])), print_log, "init, add to cell " + str(0))
+    a = cg.axiom
+    for r in cg.rulesByLhs[a]:
+        T.get(0).cAppend(Item(0, r, 0, []), tracer, "init")
 
     return T
 
 
 # Insert in the table any new items resulting from the pred operation for the iterm it
-def pred(g, it, T, j, print_log):
+def pred(g, it, T, j, tracer, lookahead=None):
     # g: Grammar
     # it: Item (A -> α . β, i)
     # T: table
     # j : index
-    # print_log: boolean that indicates whether to print log information or not
+    # tracer: Tracer (see CONTI_Trace), None if nothing is traced
+    # lookahead: Integer (id of the letter w[j], -1 after the end of the word), None to predict without looking at it
+
+    cg = g.compile()
+    nxt = cg.rules[it.rule][1][it.dot]  # β1
+
+    # if β1 -->* ε, add (A -> αβ1•β2, i) to T[j] at once (Aycock and Horspool): the completion
+    # of β1 in T[j] may already have been done, before it was waiting for it. Its link is the node
+    # of β1 for the empty subword, which gets all the derivations of ε when they are completed
+    if cg.nullable[nxt]:
+        node = T.get(j).node(nxt, j)[0]
+        T.get(j).cAppend(Item(it.i, it.rule, it.dot + 1, [(it, node)]), tracer, "pred")
 
     # foreach β1 -> γ in P, add (β1 -> .γ, j) to T[j]
-    for r in g.rules:
-        if str(r.lhs) == str(it.ad[0]):
-            T.get(j).cAppend(Item(j, r.lhs, [], r.rhs, Tree(r.lhs, [])), print_log, "pred, add to cell " + str(j))
+    # (only once per cell: the items are the same for all the items waiting for β1)
+    # with the lookahead, only the rules where γ can begin with w[j] (or give ε) are predicted,
+    # the other items could never be scanned
+    if nxt in T.get(j).predicted:
+        return
+    T.get(j).predicted.add(nxt)
+    if lookahead is None:
+        rules = cg.rulesByLhs[nxt]
+    else:
+        rules = cg.rulesStartingWith(nxt, lookahead) + cg.emptyRules[nxt]
+    for r in rules:
+        T.get(j).cAppend(Item(j, r, 0, []), tracer, "pred")
 
 
-# Insert in the table any new items resulting from the scan operation for the item it
-def scan(it, T, j, w, print_log):
-    # it: Item (A -> α . β, i)
+# Insert in the table any new items resulting from the scan operation for the items of T[j] when the letter a is read
+def scan(T, j, a, tracer):
     # T: table
     # j: index
-    # w: word
-    # print_log: boolean that indicates whether to print log information or not
-
-    # if β1 = uj then add (A -> αβ1•β2:|β|, i) to T[j +1]
-    if str(it.ad[0]) == str(w[j]):
-        T.get(j+1).cAppend(Item(it.i, it.lhs, it.bd + [it.ad[0]], it.ad[1:], Tree(it.lhs, it.tree.branches + [it.ad[0]])), print_log, "scan, add to cell " + str(j+1))
+    # a: Integer (id of the terminal w[j], -1 if it is not a terminal of the grammar)
+    # tracer: Tracer (see CONTI_Trace), None if nothing is traced
+
+    # for all (A -> α•β1β2, i) in T[j] with β1 = uj, add (A -> αβ1•β2:|β|, i) to T[j +1]
+    # (they are the items of T[j] waiting for β1)
+    waiting = T.get(j).waiting.get(a, [])
+    if waiting:
+        terminal = T.get(j).g.symbols[a]  # the Symbol that is read, to be put in the tree
+    for it in waiting:
+        T.get(j+1).cAppend(Item(it.i, it.rule, it.dot + 1, [(it, terminal)]), tracer, "scan")
+
+
+# Return the topmost item of the deterministic chain of completions (Leo) that starts when B is
+# completed in T[i], for i smaller than the current column. The chain exists when T[i] contains a
+# single item waiting for B and this item is (A -> α•B, k): completing B in T[i] then only completes
+# A in T[k], and so on. Instead of adding every item of the chain to the current column (a quadratic
+# number of items for right recursive rules), only the topmost one is added. The results are kept
+# in the field leo of the cells, so each chain is only followed once. The chain is stopped at the
+# items starting in T[0], which are always added, so that the successful items are in the last cell.
+# Returns (x, chain) with x the item (A′ -> α′•A″, i′) of the topmost item and chain the linked list
+# of the items of the chain (ending with x), or None
+def leo_item(T, i, B):
+    # T: table
+    # i: index (of a cell already completed)
+    # B: Integer (the completed symbol)
+
+    cg = T.get(i).g
+    path = []  # (cell, symbol, item (A -> α•B, k)) of the chain not yet in the field leo
+    seen = set()  # (index, symbol) of the chain
+    top = None  # topmost item of the part of the chain already known
+    while True:
+        cell = T.get(i)
+        if B in cell.leo:
+            top = cell.leo[B]
+            break
+        waiting = cell.waiting.get(B, [])
+        if len(waiting) != 1 or waiting[0].dot != len(cg.rules[waiting[0].rule][1]) - 1 or (i, B) in seen:
+            # no chain here (or a cycle of unit rules): the items are completed one by one
+            if (i, B) in seen:
+                path = [(c, s, None) for (c, s, x) in path]
+            cell.leo[B] = None
+            break
+        seen.add((i, B))
+        x = waiting[0]
+        path.append((cell, B, x))
+        if x.i == 0:
+            break
+        i, B = x.i, cg.rules[x.rule][0]
+
+    for cell, B, x in reversed(path):
+        if x is None:
+            top = None
+        elif top is None:
+            top = (x, (x, None))
+        else:
+            top = (top[0], (x, top[1]))
+        cell.leo[B] = top
+    return top
 
 
 # Insert in the table any possible new items resulting from the comp operation for the item it
-def comp(it,T,j, print_log):
+def comp(it,T,j, tracer):
     # it: Item (A -> α . β, i)
     # T: table
     # j: index
-    # print_log: boolean that indicates whether to print log information or not
-
-    k_prime = 0 # k_prime loops through T[i]
-    while k_prime < T.get(it.i).cLen():
-        # it_prime: Item (i', A′ -> α′•β′) in T[i][k′]
-        it_prime = T.get(it.i).cGet(k_prime)
-        # if β′1 =A then add((A′ -> α′β′1•β′2:|β′|, i′) to T[j]
-        if it_prime.ad: # to avoid index out of range
-            if str(it_prime.ad[0]) == str(it.lhs):
-                T.get(j).cAppend(Item(it_prime.i, it_prime.lhs, it_prime.bd + [it_prime.ad[0]], it_prime.ad[1:], Tree(it_prime.lhs, it_prime.tree.branches + [it.tree])), print_log, "comp, add to cell " + str(j))
+    # tracer: Tracer (see CONTI_Trace), None if nothing is traced
+
+    cg = T.get(j).g
+    lhs = cg.rules[it.rule][0]  # A
+    # the item is one more derivation of the node of A for w[i] ... w[j-1]
+    node, new = T.get(j).node(lhs, it.i)
+    node.alternatives.append(it)
+    # the items waiting for A only have to be advanced once per node, and never when i = j:
+    # pred already advanced them over the nullable A with this node as link
+    if not new or it.i == j:
+        return
+    # if T[i] has a deterministic chain for A, only its topmost item is added
+    top = leo_item(T, it.i, lhs)
+    if top is not None:
+        x, chain = top  # x: the item (A′ -> α′•A″, i′) of the topmost item
+        child = node if chain[1] is None else LeoNode(node, chain, cg)  # the node below the topmost item
+        T.get(j).cAppend(Item(x.i, x.rule, x.dot + 1, [(x, child)]), tracer, "comp")
+        return
+    # only the items of T[i] waiting for A are looked at
+    waiting = T.get(it.i).waiting.get(lhs, [])
+    k_prime = 0 # k_prime loops through the items of T[i] waiting for A
+    while k_prime < len(waiting):
+        # it_prime: Item (i', A′ -> α′•Aβ′) in T[i]
+        it_prime = waiting[k_prime]
+        # add (A′ -> α′A•β′:|β′|, i′) to T[j]
+        T.get(j).cAppend(Item(it_prime.i, it_prime.rule, it_prime.dot + 1, [(it_prime, node)]), tracer, "comp")
         k_prime += 1
 
 
@@ -247,65 +428,110 @@ def table_complete(g, w, T):
     # w: word
     # T: table
 
+    cg = g.compile()
     # for all items in T[|u|]
     for i in range(T.get(len(w)).cLen()):
         it = T.get(len(w)).cGet(i)
         # if the item is of form (S -> α•, 0) then the analysis is successful
-        if (it.i == 0) and (str(it.lhs) == str(g.axiom)) and (not it.ad):
+        if (it.i == 0) and (cg.rules[it.rule][0] == cg.axiom) and (it.dot == len(cg.rules[it.rule][1])):
             return True
     return False
 
-# if the analysis is successful, print the trees
-def printTree(g, w, T):
+# Yields the trees of the word w one by one from the table T (none if the analysis failed)
+def iter_trees(g, w, T):
     # g: Grammar
     # w: word
     # T: table
 
-    # for all items in T[|u|]
-    for i in range(T.get(len(w)).cLen()):
-        it = T.get(len(w)).cGet(i)
-        # if the item is of form (S -> α•, 0) then the analysis is successful
-        if (it.i == 0) and (str(it.lhs) == str(g.axiom)) and (not it.ad):
-            print(it.tree)
+    cg = g.compile()
+    # the node of S for the whole word holds all the items (S -> α•, 0) of T[|u|]
+    root = T.get(len(w)).nodes.get((cg.axiom, 0))
+    if root is not None:
+        yield from root.trees()
+
+# if the analysis is successful, print the trees (at most limit of them if it is given)
+def printTree(g, w, T, limit=None):
+    # g: Grammar
+    # w: word
+    # T: table
+    # limit: Integer (greatest number of trees printed, all if None)
+
+    for t in islice(iter_trees(g, w, T), limit):
+        print(t)
 
 
 # Parse the word w for the grammar g return the parsing table at the end of the algorithm
-def parse_earley(g, w, print_log):
+def parse_earley(g, w, print_log, tracer=None, lookahead=False, stats=None):
     # g: Grammar
     # w: word
     # print_log: boolean that indicates whether to print log information or not
+    # tracer: Tracer (see CONTI_Trace) receiving the events instead of printing them, None by default
+    # lookahead: boolean that indicates whether to only predict the rules that can begin with the next letter
+    # stats: ParseStats (see CONTI_Stats) filled by the parse, None if nothing is counted
 
+    if print_log and tracer is None:
+        tracer = PrintTracer()
+    T = build_earley_table(g, w, tracer, lookahead, stats)
+
+    if table_complete(g, w, T):
+        print("Success")
+        printTree(g, w, T)
+    else:
+        print("Failed parsing")
+
+    return T
+
+
+# Fill the parsing table of the word w for the grammar g (without printing the result) and return it
+def build_earley_table(g, w, tracer=None, lookahead=False, stats=None):
+    # g: Grammar
+    # w: word
+    # tracer: Tracer (see CONTI_Trace), None if nothing is traced
+    # lookahead: boolean that indicates whether to only predict the rules that can begin with the next letter
+    # stats: ParseStats (see CONTI_Stats) filled by the parse, None if nothing is counted
+
+    # cg: integer tables of the grammar, wid: the word as a list of terminal ids
+    cg = g.compile()
+    wid = cg.encode(w)
 
     # Initialisation
-    T = init(g,w, print_log)
+    start = time.perf_counter()
+    T = init(g,w, tracer)
+    times = {"init": time.perf_counter() - start, "close": 0.0, "scan": 0.0}  # time spent in each phase
 
     # Top-down analysis
     for j in range(len(w) + 1): # j loops through T
-        if print_log:
-            print("j = " +str(j))
+        # if no item could read w[j-1], this cell and the next ones stay empty: the analysis has already failed
+        if T.get(j).cLen() == 0:
+            break
+        if tracer is not None:
+            tracer.trace("column", j, None, cg)
+        la = (wid[j] if j < len(w) else -1) if lookahead else None  # lookahead given to pred
+        start = time.perf_counter()
         k = 0  # k loops through T[j]
         while k < T.get(j).cLen():
             item = T.get(j).cGet(k)    # we will be working with the item in T[j][k]: (A -> α•β,i)
-            if item.ad == []:   # if β = ε
+            rhs = cg.rules[item.rule][1]
+            if item.dot == len(rhs):   # if β = ε
                 # comp?
-                comp(item, T, j, print_log)
-            elif g.isNonTerminal(item.ad[0]): # if β1 ∈ N
+                comp(item, T, j, tracer)
+            elif cg.nonTerminal[rhs[item.dot]]: # if β1 ∈ N
                 # pred?
-                pred(g, item, T, j, print_log)
-            elif j < len(w):
-                # scan?
-                scan(item, T, j, w, print_log)
+                pred(g, item, T, j, tracer, la)
             k += 1
-
-
-    if table_complete(g, w, T):
-        print("Success")
-        printTree(g, w, T)
-    else:
-        print("Failed parsing")
-
+        times["close"] += time.perf_counter() - start
+        # scan, once T[j] is complete, only for the items waiting for w[j]
+        if j < len(w):
+            start = time.perf_counter()
+            scan(T, j, wid[j], tracer)
+            times["scan"] += time.perf_counter() - start
+
+    if stats is not None:
+        stats.times = times
+        count_table(g, w, T, stats)
     return T
 
+
 # --------------
 # Definition of the symbols
 symS = Symbol("S")
@@ -380,34 +606,35 @@ g3 = Grammar(
 )
 
 # --------------
-words = ["aab", "b", "aaaaab", "abab"]
+if __name__ == "__main__":
+    words = ["aab", "b", "aaaaab", "abab"]
 
-print("GRAMMAR 1:")
-print(g1)
-print()
-for word in words:
-    print("Is the word " + word + " generated by g1?")
-    parse_earley(g1, word, False)
+    print("GRAMMAR 1:")
+    print(g1)
     print()
+    for word in words:
+        print("Is the word " + word + " generated by g1?")
+        parse_earley(g1, word, False)
+        print()
 
 
-print("GRAMMAR 2:")
-print(g2)
-print()
-for word in words:
-    print("Is the word " + word + " generated by g2?")
-    parse_earley(g2, word, False)
+    print("GRAMMAR 2:")
+    print(g2)
     print()
+    for word in words:
+        print("Is the word " + word + " generated by g2?")
+        parse_earley(g2, word, False)
+        print()
 
 
 
-print("GRAMMAR 3:")
-print(g3)
-print()
-for word in words:
-    print("Is the word " + word + " generated by g3?")
-    parse_earley(g3, word, False)
+    print("GRAMMAR 3:")
+    print(g3)
     print()
+    for word in words:
+        print("Is the word " + word + " generated by g3?")
+        parse_earley(g3, word, False)
+        print()
 
 
 
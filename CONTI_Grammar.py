@@ -0,0 +1,569 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Grammar classes shared by the CYK and the Earley parsers
+#
+# A grammar is written with Symbol and Rule objects, then compiled once into integer
+# tables (see CompiledGrammar) which are the only thing the parsers look at while
+# they fill their tables: comparing two integers is much cheaper than building and
+# comparing the names of two symbols.
+# ----------------------------------------------------------------------------------
+
+from collections import deque
+
+
+class Symbol:
+    # field name: String
+    # (no methods)
+
+    def __init__(self, name):
+        # name: String
+
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    # two symbols with the same name are the same symbol
+    def __eq__(self, other):
+        return isinstance(other, Symbol) and self.name == other.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+
+class Rule:
+    # field lhs: Symbol
+    # field rhs: list of Symbol
+    # field weight: Float (log-probability of the rule, only used by the weighted parsers)
+    # (no methods)
+
+    def __init__(self, lhs, rhs, weight=0.0):
+        # lhs: Symbol (left hand side)
+        # rhs: list of Symbol (right hand side)
+        # weight: Float
+
+        self.lhs = lhs
+        self.rhs = rhs
+        self.weight = weight
+
+    def __str__(self):
+        if self.weight != 0.0:
+            return str(self.lhs) + " --> [" + ",".join([str(s) for s in self.rhs]) + "] (" + str(self.weight) + ")"
+        return str(self.lhs) + " --> [" + ",".join([str(s) for s in self.rhs]) + "]"
+
+
+class Grammar:
+    # field symbols: list of Symbol
+    # field axiom: Symbol
+    # field rules: list of Rule
+    # field name: String
+    # field nonTerminals: set of Symbol
+    # field compiled: CompiledGrammar (None until compile is called)
+    # field cnf: CNFGrammar (None until toCNF is called)
+    # method createNewSymbol: String -> Symbol
+    # method isNonTerminal: Symbol -> Boolean
+    # method compile: -> CompiledGrammar
+    # method toCNF: -> CNFGrammar
+    # method untransform: Tree -> Tree
+
+    def __init__(self, symbols, axiom, rules, name):
+        # symbols: list of Symbol
+        # axiom: Symbol
+        # rules: list of Rule
+        # name: String
+
+        self.symbols = symbols
+        self.axiom = axiom
+        self.rules = rules
+        self.name = name
+
+        self.nonTerminals = set()
+        for rule in rules:
+            self.nonTerminals.add(rule.lhs)
+
+        self.compiled = None
+        self.cnf = None
+
+    # Returns a new symbol (with a new name build from the argument)
+    def createNewSymbol(self, symbolName):
+        # symbolName: String
+
+        name = symbolName
+
+        ok = False
+        while (ok == False):
+            ok = True
+            for s in self.symbols:
+                if s.name == name:
+                    ok = False
+                    continue
+
+            if ok == False:
+                name = name + "'"
+
+        return Symbol(name)
+
+    def isNonTerminal(self, symbol):
+        # symbol: Symbol
+
+        return symbol in self.nonTerminals
+
+    # Returns the compiled form of the grammar. It is built on the first call and then
+    # cached, so the rules must not be modified once the grammar has been used by a parser
+    def compile(self):
+        if self.compiled is None:
+            self.compiled = CompiledGrammar(self)
+        return self.compiled
+
+    # Returns the grammar converted to Chomsky Normal Form (converted on the first call, then cached)
+    def toCNF(self):
+        if self.cnf is None:
+            self.cnf = convertToCNF(self)
+        return self.cnf
+
+    # Returns the tree t of this grammar written with the rules of the grammar it was converted
+    # from: t itself, except for a CNFGrammar
+    def untransform(self, t):
+        return t
+
+    def __str__(self):
+        return "{" + \
+               "symbols = [" + ",".join([str(s) for s in self.symbols]) + "] " + \
+               "axiom = " + str(self.axiom) + " " + \
+               "rules = [" + ", ".join(str(r) for r in self.rules) + "]" + \
+               "}"
+
+
+# ----------------------------------------------------------------------------------
+# Lexers
+#
+# The parsers take a word as a sequence of tokens, each token being the name of a
+# terminal: a String is the sequence of its characters, as in the examples, and a list
+# of String is a sequence of tokens of any length. A lexer is a function that turns a
+# text into such a list; any function String -> list of String can be used.
+# ----------------------------------------------------------------------------------
+
+# Returns the characters of the text (the terminals are letters)
+def charTokens(text):
+    return list(text)
+
+# Returns the words of the text separated by white space (the terminals are words)
+def wordTokens(text):
+    return text.split()
+
+
+# Returns the bitset of the integers of ids (all smaller than size)
+def bitset(ids, size):
+    bits = bytearray((size + 7) // 8)
+    for i in ids:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+class CompiledGrammar:
+    # Every symbol of the grammar is interned to a dense integer id (its position in
+    # the field symbols), and every rule is stored as a tuple of such ids.
+    #
+    # field symbols: list of Symbol (symbols[s] is the symbol of id s)
+    # field ids: dictionary String -> Integer (name of a symbol -> id of the symbol)
+    # field terminals: dictionary String -> Integer (same as ids, for terminals only)
+    # field nonTerminal: list of Boolean (nonTerminal[s] is True if s is a non terminal)
+    # field nonTerminals: list of Integer (the ids of the non-terminals, in increasing order)
+    # field ntIndex: dictionary Integer -> Integer (id of a non-terminal -> its position in nonTerminals, a dense
+    #                number from 0 to |N|-1 for the tables which only hold non-terminals)
+    # field axiom: Integer (id of the axiom)
+    # field rules: list of (Integer, tuple of Integer) (rules[r] is (lhs, rhs) for the r-th rule of the grammar)
+    # field rulesByLhs: list of list of Integer (rulesByLhs[A] are the numbers of the rules A -> α)
+    # field nullable: list of Boolean (nullable[A] is True if A -->* ε)
+    # field first: list of Integer (first[X] is the bitset of the terminals a such that X -->* aγ)
+    # field ruleFirst: list of Integer (ruleFirst[r] is the bitset of the terminals a such that α -->* aγ for the rule r: A -> α)
+    # field ruleEmpty: list of Boolean (ruleEmpty[r] is True if α -->* ε for the rule r: A -> α)
+    # field emptyRules: list of list of Integer (emptyRules[A] are the numbers of the rules A -> α such that α -->* ε)
+    # field predictions: dictionary (Integer, Integer) -> list of Integer (results of rulesStartingWith already computed)
+    # field lexical: dictionary Integer -> list of Integer (a -> all the A of the rules A -> a)
+    # field binary: dictionary (Integer, Integer) -> list of Integer (B, C -> all the A of the rules A -> BC)
+    # field rightOf: dictionary Integer -> Integer (B -> bitset of all the C such that there is a rule A -> BC)
+    # field weight: dictionary (Integer, tuple of Integer) -> Float (lhs, rhs -> greatest weight of such a rule)
+    # method firstOf: tuple of Integer -> Integer
+    # method rulesStartingWith: Integer * Integer -> list of Integer
+    # method encode: word -> list of Integer
+
+    def __init__(self, gr):
+        # gr: Grammar
+
+        self.symbols = []
+        self.ids = {}
+
+        # the symbols of the alphabet come first, then those only used in the rules
+        for s in gr.symbols:
+            self.intern(s)
+        self.intern(gr.axiom)
+        for r in gr.rules:
+            self.intern(r.lhs)
+            for s in r.rhs:
+                self.intern(s)
+
+        self.nonTerminal = [gr.isNonTerminal(s) for s in self.symbols]
+        self.nonTerminals = [s for s in range(len(self.symbols)) if self.nonTerminal[s]]
+        self.ntIndex = {s: k for k, s in enumerate(self.nonTerminals)}
+        self.terminals = {}
+        for s in range(len(self.symbols)):
+            if not self.nonTerminal[s]:
+                self.terminals[self.symbols[s].name] = s
+
+        self.axiom = self.ids[gr.axiom.name]
+        self.rules = [(self.ids[r.lhs.name], tuple(self.ids[s.name] for s in r.rhs)) for r in gr.rules]
+
+        self.rulesByLhs = [[] for s in self.symbols]
+        for r in range(len(self.rules)):
+            self.rulesByLhs[self.rules[r][0]].append(r)
+
+        self.nullable = [False] * len(self.symbols)
+        changed = True
+        while changed:
+            changed = False
+            for r in range(len(self.rules)):
+                a, rhs = self.rules[r]
+                if not self.nullable[a] and all(self.nullable[s] for s in rhs):
+                    self.nullable[a] = True
+                    changed = True
+
+        # the terminals that begin a rule (after nullable symbols) are put directly in the FIRST set of
+        # its lhs, then the FIRST sets of the non-terminals found there are added until nothing changes
+        # (only along these pairs, so a large vocabulary is not gone through at each step)
+        direct = [[] for s in self.symbols]    # direct[A]: terminals that begin a rule A -> α
+        flows = set()   # (A, B): FIRST(B) is included in FIRST(A)
+        for a, rhs in self.rules:
+            for s in rhs:
+                if self.nonTerminal[s]:
+                    flows.add((a, s))
+                else:
+                    direct[a].append(s)
+                if not self.nullable[s]:
+                    break
+        self.first = [bitset(direct[s], len(self.symbols)) if self.nonTerminal[s] else 1 << s for s in range(len(self.symbols))]
+        changed = True
+        while changed:
+            changed = False
+            for a, b in flows:
+                f = self.first[a] | self.first[b]
+                if f != self.first[a]:
+                    self.first[a] = f
+                    changed = True
+
+        self.ruleFirst = [self.firstOf(rhs) for a, rhs in self.rules]
+        self.ruleEmpty = [all(self.nullable[s] for s in rhs) for a, rhs in self.rules]
+        self.emptyRules = [[] for s in self.symbols]
+        for r in range(len(self.rules)):
+            if self.ruleEmpty[r]:
+                self.emptyRules[self.rules[r][0]].append(r)
+        self.predictions = {}
+
+        self.lexical = {}
+        for a, rhs in self.rules:
+            if len(rhs) == 1 and not self.nonTerminal[rhs[0]]:
+                self.lexical.setdefault(rhs[0], []).append(a)
+
+        self.binary = {}
+        self.rightOf = {}
+        for a, rhs in self.rules:
+            if len(rhs) == 2:
+                self.binary.setdefault(rhs, []).append(a)
+                self.rightOf[rhs[0]] = self.rightOf.get(rhs[0], 0) | (1 << rhs[1])
+
+        self.weight = {}
+        for r in range(len(gr.rules)):
+            if self.weight.get(self.rules[r], gr.rules[r].weight) <= gr.rules[r].weight:
+                self.weight[self.rules[r]] = gr.rules[r].weight
+
+    # Returns the id of the symbol s, giving it a new id if it has none yet
+    def intern(self, s):
+        # s: Symbol
+
+        if s.name not in self.ids:
+            self.ids[s.name] = len(self.symbols)
+            self.symbols.append(s)
+        return self.ids[s.name]
+
+    # Returns the bitset of the terminals a such that the sequence of symbols rhs -->* aγ
+    def firstOf(self, rhs):
+        # rhs: tuple of Integer
+
+        f = 0
+        for s in rhs:
+            f |= self.first[s]
+            if not self.nullable[s]:
+                break
+        return f
+
+    # Returns the numbers of the rules A -> α such that α -->* aγ and not α -->* ε, for the terminal a (or
+    # -1 after the end of the word). They are computed the first time they are asked for and then kept:
+    # with a large vocabulary most pairs (A, a) never happen, and a table of all of them would be huge
+    def rulesStartingWith(self, A, a):
+        # A: Integer (non-terminal)
+        # a: Integer (terminal, or -1)
+
+        key = (A, a)
+        if key not in self.predictions:
+            self.predictions[key] = [r for r in self.rulesByLhs[A] if a >= 0 and not self.ruleEmpty[r] and (self.ruleFirst[r] >> a) & 1]
+        return self.predictions[key]
+
+    # Returns the word w as a list of terminal ids (-1 for letters that are not terminals
+    # of the grammar, which can never be matched by a rule): the tokens are only looked up
+    # here, the parsers then compare integers
+    def encode(self, w):
+        # w: word (String, each character being a token, or sequence of String tokens)
+
+        return [self.terminals.get(str(c), -1) for c in w]
+
+
+# ----------------------------------------------------------------------------------
+# Conversion to Chomsky Normal Form
+#
+# The grammar is transformed in five steps (START, TERM, BIN, DEL, UNIT). To report
+# the trees of the converted grammar with the rules of the original one, each rule
+# keeps a template: a list of parts, each part being either
+#   ("node", A, parts): a node of label A of the original tree, with the given branches
+#   ("child", k): what the k-th symbol of the right hand side of the rule becomes
+# so a tree of the converted grammar is turned back into the original tree by
+# evaluating, at each node, the template of its rule (see CNFGrammar.untransform).
+# Symbols created by BIN have templates without node: their branches are inserted
+# in the node of their parent. Symbols deleted by DEL are replaced by the template of
+# their best derivation of the empty word, and the nodes skipped by UNIT are put back
+# by composing the templates of the unit rules of the best chain.
+# Only one template is kept per rule of the converted grammar: the other derivations of
+# the empty word, the other unit chains and the rules written twice give trees of the
+# original grammar that the converted one does not give back. So the converted grammar
+# generates the same words, with the best score, but its trees are only a part of the
+# trees of the original grammar, and their number is a lower bound of the number of parses.
+# ----------------------------------------------------------------------------------
+
+class CNFGrammar(Grammar):
+    # field source: Grammar (the grammar which was converted)
+    # field templates: dictionary (String, tuple of String) -> list of parts
+    #                  (names of lhs and rhs of a rule -> its template)
+    # method untransform: Tree -> Tree
+
+    def __init__(self, symbols, axiom, rules, name, source, templates):
+        Grammar.__init__(self, symbols, axiom, rules, name)
+        self.source = source
+        self.templates = templates
+
+    # Returns the tree of the source grammar corresponding to the tree t of this grammar
+    # (a new tree of the same class as t)
+    def untransform(self, t):
+        # t: Tree (whose root is the axiom)
+
+        # the branches of the source tree for each subtree of t (by id), computed after those of its
+        # branches with an explicit stack, so that deep trees do not exceed the recursion limit
+        done = {}
+        todo = [(t, False)]
+        while todo:
+            b, ready = todo.pop()
+            if ready:
+                children = [[c] if isinstance(c, Symbol) else done[id(c)] for c in b.branches]
+                done[id(b)] = evalTemplate(self.templates[key(b)], children, type(b))
+            else:
+                todo.append((b, True))
+                todo.extend((c, False) for c in b.branches if not isinstance(c, Symbol))
+        return done[id(t)][0]
+
+
+# Returns the key of the rule used at the root of the tree t in the templates of a CNFGrammar
+def key(t):
+    return (t.label.name, tuple(b.name if isinstance(b, Symbol) else b.label.name for b in t.branches))
+
+
+# Returns the list of branches built by the template parts, children[k] being the list of
+# branches of the k-th symbol of the right hand side of the rule
+def evalTemplate(parts, children, Tree):
+    branches = []
+    for part in parts:
+        if part[0] == "child":
+            branches.extend(children[part[1]])
+        else:
+            branches.append(Tree(part[1], evalTemplate(part[2], children, Tree)))
+    return branches
+
+
+# Returns the template parts where every ("child", k) is replaced by the list of parts f(k)
+def substitute(parts, f):
+    result = []
+    for part in parts:
+        if part[0] == "child":
+            result.extend(f(part[1]))
+        else:
+            result.append(("node", part[1], substitute(part[2], f)))
+    return result
+
+
+# Returns the grammar gr converted to Chomsky Normal Form (a CNFGrammar). The weight of a
+# converted rule is the sum of the weights of the original rules it stands for (of the best
+# ones when it stands for several derivations, so that Viterbi finds the best tree of gr)
+def convertToCNF(gr):
+    # gr: Grammar
+
+    symbols = list(gr.compile().symbols)   # the symbols of the converted grammar
+    names = {s.name for s in symbols}       # their names, so that a new symbol gets a name not used yet
+
+    def newSymbol(name):
+        while name in names:
+            name = name + "'"
+        names.add(name)
+        symbols.append(Symbol(name))
+        return symbols[-1]
+
+    # the rules being transformed: list of (lhs, rhs, template, weight)
+    rules = [(r.lhs, list(r.rhs), [("node", r.lhs, [("child", k) for k in range(len(r.rhs))])], r.weight) for r in gr.rules]
+    nonTerminals = set(gr.nonTerminals)
+    axiom = gr.axiom
+
+    # START: the axiom must not appear in a right hand side
+    if any(axiom in rhs for lhs, rhs, tpl, weight in rules):
+        axiom = newSymbol(gr.axiom.name + "0")
+        nonTerminals.add(axiom)
+        rules.append((axiom, [gr.axiom], [("child", 0)], 0.0))
+
+    # TERM: in the rules of length >= 2, the terminals a are replaced by new symbols N_a -> a
+    termSymbols = {}    # terminal -> the non-terminal that replaces it
+    result = []
+    for lhs, rhs, tpl, weight in rules:
+        if len(rhs) >= 2:
+            for k in range(len(rhs)):
+                if rhs[k] not in nonTerminals:
+                    if rhs[k] not in termSymbols:
+                        termSymbols[rhs[k]] = newSymbol("N_" + rhs[k].name)
+                        nonTerminals.add(termSymbols[rhs[k]])
+                        result.append((termSymbols[rhs[k]], [rhs[k]], [("child", 0)], 0.0))
+                    rhs[k] = termSymbols[rhs[k]]
+        result.append((lhs, rhs, tpl, weight))
+    rules = result
+
+    # BIN: A -> X1 X2 ... Xm becomes A -> X1 A_1, A_1 -> X2 A_2, ..., A_m-2 -> Xm-1 Xm
+    result = []
+    for lhs, rhs, tpl, weight in rules:
+        if len(rhs) <= 2:
+            result.append((lhs, rhs, tpl, weight))
+            continue
+        # the branches X2 ... Xm are given all together by A_1
+        tpl = substitute(tpl, lambda k: [("child", k)] if k <= 1 else [])
+        current = lhs
+        for k in range(len(rhs) - 2):
+            nxt = newSymbol(lhs.name + "_" + str(k + 1))
+            nonTerminals.add(nxt)
+            result.append((current, [rhs[k], nxt], tpl, weight))
+            current, tpl, weight = nxt, [("child", 0), ("child", 1)], 0.0
+        result.append((current, rhs[-2:], tpl, weight))
+    rules = result
+
+    # DEL: computation of the nullable symbols, each one with the template and the weight
+    # of its best derivation of ε. Each time the weight of a symbol gets better, the rules
+    # using it are looked at again (Bellman-Ford); a symbol is only improved a bounded number
+    # of times, in case a cycle of positive weights would improve it for ever
+    epsilon = {}    # nullable symbol -> (template, weight) of its best derivation of the empty word
+    usedBy = {}     # symbol -> positions in rules of the rules using it in their rhs
+    for p in range(len(rules)):
+        for s in set(rules[p][1]):
+            usedBy.setdefault(s, []).append(p)
+    improved = {}   # nullable symbol -> number of times its weight got better
+    todo = deque(p for p in range(len(rules)) if not rules[p][1])
+    while todo:
+        lhs, rhs, tpl, weight = rules[todo.popleft()]
+        if not all(s in epsilon for s in rhs):
+            continue
+        w = weight + sum(epsilon[s][1] for s in rhs)
+        if (lhs in epsilon and w <= epsilon[lhs][1]) or improved.get(lhs, 0) > len(nonTerminals):
+            continue
+        improved[lhs] = improved.get(lhs, 0) + 1
+        epsilon[lhs] = (substitute(tpl, lambda k, rhs=rhs: epsilon[rhs[k]][0]), w)
+        todo.extend(usedBy.get(lhs, ()))
+    # then every rule gives a rule for each way of erasing some of its nullable symbols
+    result = []
+    for lhs, rhs, tpl, weight in rules:
+        for erased in range(2 ** len(rhs)):
+            # bit k of erased is set if the k-th symbol is erased
+            if any((erased >> k) & 1 and rhs[k] not in epsilon for k in range(len(rhs))):
+                continue
+            kept = [k for k in range(len(rhs)) if not (erased >> k) & 1]
+            if not kept:
+                continue
+            position = {k: p for p, k in enumerate(kept)}
+            result.append((lhs, [rhs[k] for k in kept],
+                           substitute(tpl, lambda k, position=position, rhs=rhs: [("child", position[k])] if k in position else epsilon[rhs[k]][0]),
+                           weight + sum(epsilon[rhs[k]][1] for k in range(len(rhs)) if k not in position)))
+    if axiom in epsilon:
+        result.append((axiom, [], epsilon[axiom][0], epsilon[axiom][1]))
+    rules = result
+
+    # UNIT: the rules A -> B are replaced by A -> α for all the rules B -> α that are not unit rules
+    def isUnit(rhs):
+        return len(rhs) == 1 and rhs[0] in nonTerminals
+    result = [(lhs, rhs, tpl, weight) for lhs, rhs, tpl, weight in rules if not isUnit(rhs)]
+    units = {}      # B -> the unit rules B -> C, as (C, template, weight)
+    others = {}     # B -> the other rules of B
+    for lhs, rhs, tpl, weight in rules:
+        if isUnit(rhs):
+            units.setdefault(lhs, []).append((rhs[0], tpl, weight))
+        else:
+            others.setdefault(lhs, []).append((lhs, rhs, tpl, weight))
+    for A in [s for s in symbols if s in nonTerminals]:
+        # symbols B such that A -->* B with unit rules, with the template and weight of the best
+        # chain A -> ... -> B (relaxed as the derivations of ε above)
+        reached = {A: ([("child", 0)], 0.0)}
+        improved = {}   # symbol -> number of times the weight of its chain got better
+        todo = deque([A])
+        while todo:
+            B = todo.popleft()
+            for C, tpl, weight in units.get(B, ()):
+                w = reached[B][1] + weight
+                if C == A or (C in reached and w <= reached[C][1]) or improved.get(C, 0) > len(nonTerminals):
+                    continue
+                improved[C] = improved.get(C, 0) + 1
+                reached[C] = (substitute(reached[B][0], lambda k, tpl=tpl: tpl), w)
+                todo.append(C)
+        for B in reached:
+            if B == A:
+                continue
+            for lhs, rhs, tpl, weight in others.get(B, ()):
+                result.append((A, rhs, substitute(reached[B][0], lambda k, tpl=tpl: tpl), reached[B][1] + weight))
+    rules = result
+
+    # the rules using a non-terminal which no longer derives any word (for instance one
+    # whose only rule was A -> ε) are removed
+    # (each rule waits for the number of its non-terminals not yet known to be productive)
+    productive = set()
+    missing = []    # missing[p]: number of the non-terminals of the rhs of rules[p] not yet productive
+    usedBy = {}     # non-terminal -> positions in rules of the rules using it in their rhs
+    todo = []       # symbols just found productive
+    for p in range(len(rules)):
+        lhs, rhs = rules[p][0], rules[p][1]
+        missing.append(0)
+        for s in rhs:
+            if s in nonTerminals:
+                missing[p] += 1
+                usedBy.setdefault(s, []).append(p)
+        if missing[p] == 0 and lhs not in productive:
+            productive.add(lhs)
+            todo.append(lhs)
+    while todo:
+        for p in usedBy.get(todo.pop(), ()):
+            missing[p] -= 1
+            if missing[p] == 0 and rules[p][0] not in productive:
+                productive.add(rules[p][0])
+                todo.append(rules[p][0])
+    rules = [r for r in rules if all(s in productive or s not in nonTerminals for s in r[1])]
+
+    # only one rule of each (lhs, rhs) is kept: the one of greatest weight (the first one if equal)
+    best = {}   # (names of lhs and rhs) -> position in rules of the rule kept
+    for p in range(len(rules)):
+        k = (rules[p][0].name, tuple(s.name for s in rules[p][1]))
+        if k not in best or rules[p][3] > rules[best[k]][3]:
+            best[k] = p
+    templates = {}
+    cnfRules = []
+    for k, p in sorted(best.items(), key=lambda kp: kp[1]):
+        lhs, rhs, tpl, weight = rules[p]
+        templates[k] = tpl
+        cnfRules.append(Rule(lhs, rhs, weight))
+
+    return CNFGrammar(symbols, axiom, cnfRules, gr.name + " (CNF)", gr, templates)
@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Grammars written in a text file, and cache of their compiled form
+#
+# Format (one or more rules per line, '#' starts a comment):
+#   %axiom S                    optional, the axiom is otherwise the lhs of the first rule
+#   S -> A S | b                the alternatives are separated by '|'
+#       | b b                   a line beginning with '|' continues the rules of the previous lhs
+#   A -> ε                      ε, or nothing, for the empty right hand side
+#   A -> a (-0.5)               an optional weight in parentheses ends an alternative
+#   P -> "->" "|" "a b"         a symbol can be quoted ('\' escapes a quote or a '\')
+# The symbols are separated by white space; those which are the lhs of a rule are the
+# non-terminals, the others are the terminals.
+#
+# loadGrammar(path, cacheDir) parses and compiles the grammar of the file, and keeps the
+# result (the Grammar with its CompiledGrammar: symbol table, rule indexes, nullable and
+# FIRST sets...) in cacheDir, in a file named after the hash of the content of the grammar
+# file. Next time the same grammar is loaded, this file is read instead. The cache files
+# are pickles: the cache directory must only be writable by trusted users.
+# ----------------------------------------------------------------------------------
+
+import hashlib
+import os
+import pickle
+import re
+
+from CONTI_Grammar import Symbol, Rule, Grammar
+
+
+# changed whenever the compiled form changes, so that the old cache files are not read any more
+CACHE_VERSION = 2
+
+# a quoted symbol, or any other sequence of characters without white space
+TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)')
+WEIGHT = re.compile(r"\(([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\)$")
+EPSILON = "ε"
+
+
+# Returns the tokens of a line of the grammar file as (String, Boolean: True if the token was quoted)
+def splitLine(line):
+    tokens = []
+    for m in TOKEN.finditer(line):
+        if m.group(1) is not None:
+            tokens.append((re.sub(r"\\(.)", r"\1", m.group(1)), True))
+        elif m.group(2).startswith("#"):
+            break
+        else:
+            tokens.append((m.group(2), False))
+    return tokens
+
+
+# Returns the Grammar written in text
+def parseGrammar(text, name="grammar"):
+    # text: String (content of a grammar file)
+    # name: String (name of the grammar)
+
+    symbols = {}    # name -> Symbol, in the order of their first appearance
+    rules = []
+    axiom = None    # name of the axiom given by %axiom
+    lhs = None      # lhs of the last rule, for the lines beginning with '|'
+
+    # Returns the symbol of this name (the same object for all its occurrences)
+    def symbol(name):
+        if name not in symbols:
+            symbols[name] = Symbol(name)
+        return symbols[name]
+
+    for lineNumber, line in enumerate(text.splitlines(), 1):
+        tokens = splitLine(line)
+        if not tokens:
+            continue
+        if tokens[0] == ("%axiom", False):
+            if len(tokens) != 2:
+                raise ValueError("line %d: expected '%%axiom <symbol>'" % lineNumber)
+            axiom = tokens[1][0]
+            continue
+        if tokens[0] == ("|", False):
+            if lhs is None:
+                raise ValueError("line %d: '|' without a previous rule" % lineNumber)
+            alternatives = tokens
+        elif len(tokens) >= 2 and tokens[1] == ("->", False) and tokens[0] != (EPSILON, False):
+            lhs = symbol(tokens[0][0])
+            alternatives = [("|", False)] + tokens[2:]
+        else:
+            raise ValueError("line %d: expected '<symbol> -> ...' or '| ...'" % lineNumber)
+
+        # alternatives: each '|' ends a right hand side (the first token is always '|')
+        rhs = []
+        for token in alternatives[1:] + [("|", False)]:
+            if token == ("|", False):
+                rules.append(makeRule(lhs, rhs, symbol, lineNumber))
+                rhs = []
+            else:
+                rhs.append(token)
+
+    if not rules:
+        raise ValueError("the grammar has no rule")
+    if axiom is not None and axiom not in symbols:
+        raise ValueError("the axiom " + axiom + " is not used by any rule")
+    return Grammar(list(symbols.values()), symbol(axiom) if axiom is not None else rules[0].lhs, rules, name)
+
+
+# Returns the Rule lhs -> rhs, where rhs are the tokens of an alternative (with maybe ε or a weight)
+def makeRule(lhs, rhs, symbol, lineNumber):
+    weight = 0.0
+    if rhs and not rhs[-1][1] and WEIGHT.match(rhs[-1][0]):
+        weight = float(WEIGHT.match(rhs[-1][0]).group(1))
+        rhs = rhs[:-1]
+    if rhs == [(EPSILON, False)]:
+        rhs = []
+    for name, quoted in rhs:
+        if not quoted and name in ("->", EPSILON):
+            raise ValueError("line %d: unexpected %s in a right hand side" % (lineNumber, name))
+    return Rule(lhs, [symbol(name) for name, quoted in rhs], weight)
+
+
+# Returns the name of the symbol s as it is written in a grammar file
+def quote(s):
+    name = s.name
+    if name in ("->", "|", EPSILON, "%axiom") or name == "" or WEIGHT.match(name) or \
+            re.search(r'[\s"\\#]', name):
+        return '"' + re.sub(r'(["\\])', r"\\\1", name) + '"'
+    return name
+
+
+# Returns the text of the grammar gr in the format read by parseGrammar (one rule per line)
+def formatGrammar(gr):
+    lines = ["%axiom " + quote(gr.axiom)]
+    for r in gr.rules:
+        rhs = " ".join(quote(s) for s in r.rhs) if r.rhs else EPSILON
+        if r.weight != 0.0:
+            rhs += " (" + repr(r.weight) + ")"
+        lines.append(quote(r.lhs) + " -> " + rhs)
+    return "\n".join(lines) + "\n"
+
+
+# Returns the Grammar of the file path, already compiled (and converted to CNF if cnf is True),
+# reading it from the cache directory cacheDir when the same file was already loaded
+def loadGrammar(path, cacheDir=None, cnf=False):
+    # path: String (grammar file)
+    # cacheDir: String (directory of the cache files, no cache if None)
+    # cnf: Boolean (if True, the CNF grammar is built and compiled too, for the CYK parsers)
+
+    with open(path, "rb") as f:
+        content = f.read()
+    name = os.path.splitext(os.path.basename(path))[0]
+
+    if cacheDir is not None:
+        key = hashlib.sha256(("%d %s %s\n" % (CACHE_VERSION, cnf, name)).encode("utf-8") + content).hexdigest()
+        cachePath = os.path.join(cacheDir, key + ".grammar")
+        try:
+            with open(cachePath, "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass    # no cache file yet (or a damaged one): it is built again
+
+    gr = parseGrammar(content.decode("utf-8"), name)
+    gr.compile()
+    if cnf:
+        gr.toCNF().compile()
+
+    if cacheDir is not None:
+        # written under another name first, so that a reader never sees half a file
+        os.makedirs(cacheDir, exist_ok=True)
+        tmpPath = cachePath + ".%d.tmp" % os.getpid()
+        with open(tmpPath, "wb") as f:
+            pickle.dump(gr, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpPath, cachePath)
+    return gr
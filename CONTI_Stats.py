@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Statistics of a parse
+#
+# buildTable (CONTI_CYK), build_earley_table and parse_earley (CONTI_Earley and
+# CONTI_Earley_trees) take a ParseStats, or None. When it is None nothing is counted.
+# Otherwise the parser fills it: the time of each phase is measured during the parse,
+# the other numbers are read from the table once it is built (countTable in CONTI_CYK,
+# count_table here for the two Earley parsers), so the loops of the algorithms are not
+# slowed down. A ParseStats is filled by one parse only.
+#
+# CYK:    phases "init" and "loop"; operations "init" (rules A -> a applied on the
+#         diagonal) and "loop" (rules A -> BC applied in loop); trees of each cell
+#         (all the trees of all the non-terminals of the cell)
+# Earley: phases "init", "close" (pred and comp) and "scan"; operations "pred", "scan"
+#         and "comp" (items each operation was applied to); items of each column;
+#         items not added by cAppend because they were already in the cell
+# ruleApplications counts, for each rule, the trees (CYK) or the items (Earley) made with it.
+# ----------------------------------------------------------------------------------
+
+
+class ParseStats:
+    # field times: dictionary String -> Float (phase -> time spent in it, in seconds)
+    # field operations: dictionary String -> Integer (operation -> number of times it was applied)
+    # field ruleApplications: dictionary Integer -> Integer (number of a rule in the compiled grammar -> number of applications)
+    # field duplicates: Integer (Earley: items rejected by cAppend)
+    # field columnItems: list of Integer (Earley: columnItems[j] is the number of items of T[j])
+    # field cellTrees: dictionary (Integer, Integer) -> Integer (CYK: (i, j) -> number of trees of T[i, j])
+    # method report: Grammar * Integer -> String
+
+    def __init__(self):
+        self.times = {}
+        self.operations = {}
+        self.ruleApplications = {}
+        self.duplicates = 0
+        self.columnItems = []
+        self.cellTrees = {}
+
+    # Returns the statistics as lines of text, with the top rules most applied and the top cells with the most trees
+    def report(self, gr, top=10):
+        # gr: Grammar (the grammar of the parse, converted to CNF for CYK)
+        # top: Integer
+
+        cg = gr.compile()
+        lines = ["times: " + ", ".join("%s %.6fs" % (phase, t) for phase, t in self.times.items()),
+                 "operations: " + ", ".join("%s %d" % (op, k) for op, k in self.operations.items())]
+        if self.columnItems:
+            lines.append("items per column: " + " ".join(str(k) for k in self.columnItems))
+            lines.append("duplicates: " + str(self.duplicates))
+        if self.cellTrees:
+            cells = sorted(self.cellTrees.items(), key=lambda c: -c[1])[:top]
+            lines.append("cells with the most trees: " + ", ".join("%s: %d" % (ij, k) for ij, k in cells))
+        lines.append("rules applied the most:")
+        for r, k in sorted(self.ruleApplications.items(), key=lambda a: -a[1])[:top]:
+            lhs, rhs = cg.rules[r]
+            lines.append("  %8d  %s --> %s" % (k, cg.symbols[lhs].name, " ".join(cg.symbols[s].name for s in rhs) or "ε"))
+        return "\n".join(lines)
+
+
+# Fill stats with what is in the table T once it is built: the items of each column, the operations applied
+# to them (pred and comp to the items of T[j], scan to those waiting for w[j]) and the rules of the items
+def count_table(g, w, T, stats):
+    # g: Grammar
+    # w: word
+    # T: table (of CONTI_Earley or CONTI_Earley_trees: both cells have the fields c, waiting and duplicates)
+    # stats: ParseStats
+
+    cg = g.compile()
+    wid = cg.encode(w)
+    stats.operations = {"pred": 0, "scan": 0, "comp": 0}
+    for j in range(len(w) + 1):
+        cell = T.get(j)
+        stats.columnItems.append(cell.cLen())
+        stats.duplicates += cell.duplicates
+        for it in cell.c:
+            rhs = cg.rules[it.rule][1]
+            if it.dot == len(rhs):
+                stats.operations["comp"] += 1
+            elif cg.nonTerminal[rhs[it.dot]]:
+                stats.operations["pred"] += 1
+            stats.ruleApplications[it.rule] = stats.ruleApplications.get(it.rule, 0) + 1
+        if j < len(w):
+            stats.operations["scan"] += len(cell.waiting.get(wid[j], []))
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Tracers of the Earley parsers
+#
+# The parsers (CONTI_Earley and CONTI_Earley_trees) take a tracer, or None. When it is
+# None nothing at all is done for the trace: no string is built, only the test
+# "tracer is not None" is made when an item is added. Otherwise the method trace of
+# the tracer is called with:
+#   - the type of the event: "column" when the parser starts working on a column,
+#     "init", "pred", "scan" or "comp" when a new item is added by this operation
+#   - the column (index of the cell of the table the event is about)
+#   - the item (None for "column")
+#   - the compiled grammar (to read the rule of the item)
+# Any object with such a method can be used as a tracer.
+# ----------------------------------------------------------------------------------
+
+import json
+
+
+class Tracer:
+    # Tracer that does nothing (base class of the tracers)
+    # method trace: String * Integer * Item * CompiledGrammar -> None
+
+    def trace(self, event, column, item, cg):
+        pass
+
+
+class PrintTracer(Tracer):
+    # Prints the events as the parsers did with print_log
+    # field out: text file (sys.stdout if None)
+
+    def __init__(self, out=None):
+        self.out = out
+
+    def trace(self, event, column, item, cg):
+        if item is None:
+            print("j = " + str(column), file=self.out)
+        else:
+            print(event + ", add to cell " + str(column) + ": " + item.show(cg), file=self.out)
+
+
+class JSONLTracer(Tracer):
+    # Writes one JSON object per event and per line, for example:
+    # {"event": "pred", "column": 2, "rule": 0, "dot": 0, "i": 2, "item": "[2,S -->  • A,S]"}
+    # field out: text file (opened and closed by the caller)
+
+    def __init__(self, out):
+        self.out = out
+
+    def trace(self, event, column, item, cg):
+        if item is None:
+            record = {"event": event, "column": column}
+        else:
+            record = {"event": event, "column": column, "rule": item.rule, "dot": item.dot, "i": item.i, "item": item.show(cg)}
+        self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Parsing of many words with a pool of processes
+#
+# parse_many(grammar, words, engine, workers) recognizes every word with the chosen
+# engine and returns one BatchResult per word, in the order of the input. With maxParses,
+# the earley-trees engine also counts the trees. The cyk engine does not: the conversion
+# to CNF only gives back a part of the trees of the grammar (see convertToCNF in
+# CONTI_Grammar), so its count would only be a lower bound of the parses. The grammar
+# is compiled once, then sent once to each worker (as the argument of the initializer
+# of the pool); afterwards only chunks of words and their results go through the pipes.
+# At most a few chunks per worker are in flight at any time, so the words can come from
+# an iterator as long as wanted without being all loaded in memory. A word on which the
+# engine fails (for example a tree too deep) gets a BatchResult with an error, and the
+# following words are parsed as usual.
+# ----------------------------------------------------------------------------------
+
+import os
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+
+import CONTI_CYK
+import CONTI_Earley
+import CONTI_Earley_trees
+
+
+class BatchResult:
+    # field word: word (as given in the input)
+    # field accepted: Boolean (True if the word is generated by the grammar)
+    # field time: Float (time spent on the word by the engine, in seconds)
+    # field parses: Integer (number of trees of the word, at most maxParses), None if they were not counted
+    # field error: String (the exception raised by the engine on the word, accepted and parses being None), None if there was none
+    # (no methods)
+
+    def __init__(self, word, accepted, time, parses=None, error=None):
+        self.word = word
+        self.accepted = accepted
+        self.time = time
+        self.parses = parses
+        self.error = error
+
+    def __str__(self):
+        if self.error is not None:
+            return "%s: error %s (%.6fs)" % (self.word, self.error, self.time)
+        parses = "" if self.parses is None else ", %d parses" % self.parses
+        return "%s: %s%s (%.6fs)" % (self.word, "accepted" if self.accepted else "rejected", parses, self.time)
+
+
+# ------------------------
+# The engines: each one is a function (grammar, word, maxParses) -> (Boolean, Integer): True if the word is
+# generated, and its number of trees counted up to maxParses (None if maxParses is None or the engine only recognizes)
+
+# Returns the number of trees given by the iterator trees, counting at most limit of them (None if limit is None)
+def count_trees(trees, limit):
+    if limit is None:
+        return None
+    return sum(1 for t in islice(trees, limit))
+
+
+def recognize_cyk(gr, u, maxParses=None):
+    # the trees are not counted: the grammar converted to CNF does not give all of them
+    T = CONTI_CYK.buildTable(u, gr)
+    return CONTI_CYK.isSuccess(T, u, gr), None
+
+
+def recognize_cyk_bits(gr, u, maxParses=None):
+    T, back = CONTI_CYK.buildBitTable(u, gr)
+    return CONTI_CYK.isSuccessBits(T, u, gr), None
+
+
+def recognize_cyk_numpy(gr, u, maxParses=None):
+    # NumPy is only imported if this engine is used
+    import CONTI_CYK_numpy
+    T = CONTI_CYK_numpy.buildTableNumpy(u, gr)
+    return CONTI_CYK_numpy.isSuccessNumpy(T, u, gr), None
+
+
+def recognize_earley(gr, w, maxParses=None):
+    T = CONTI_Earley.build_earley_table(gr, w, None, True)
+    return CONTI_Earley.table_complete(gr, w, T), None
+
+
+def recognize_earley_trees(gr, w, maxParses=None):
+    T = CONTI_Earley_trees.build_earley_table(gr, w, None, True)
+    return CONTI_Earley_trees.table_complete(gr, w, T), count_trees(CONTI_Earley_trees.iter_trees(gr, w, T), maxParses)
+
+
+# name of an engine -> (recognition function, True if the engine needs a grammar in CNF)
+ENGINES = {
+    "cyk": (recognize_cyk, True),
+    "cyk-bits": (recognize_cyk_bits, True),
+    "numpy": (recognize_cyk_numpy, True),
+    "earley": (recognize_earley, False),
+    "earley-trees": (recognize_earley_trees, False),
+}
+
+
+# ------------------------
+# Worker side: the grammar and the engine are kept in these globals by the initializer
+
+worker_grammar = None
+worker_engine = None
+worker_lexer = None
+worker_max_parses = None
+
+
+def init_worker(gr, engine, lexer=None, maxParses=None):
+    # gr: Grammar (already compiled)
+    # engine: String (key of ENGINES)
+    # lexer: function String -> list of String (see CONTI_Grammar), None if the words are already sequences of tokens
+    # maxParses: Integer (greatest number of trees counted for a word, None if they are not counted)
+    global worker_grammar, worker_engine, worker_lexer, worker_max_parses
+    worker_grammar = gr
+    worker_engine = engine
+    worker_lexer = lexer
+    worker_max_parses = maxParses
+
+
+# Recognizes every word of the chunk with the grammar and the engine of the worker
+def parse_chunk(words):
+    # words: list of word
+    recognize = ENGINES[worker_engine][0]
+    results = []
+    for w in words:
+        start = time.perf_counter()
+        try:
+            accepted, parses = recognize(worker_grammar, w if worker_lexer is None else worker_lexer(w), worker_max_parses)
+        except Exception as e:
+            # the error is given back with the word, the other words of the chunk are still parsed
+            results.append(BatchResult(w, None, time.perf_counter() - start, None, "%s: %s" % (type(e).__name__, e)))
+            continue
+        results.append(BatchResult(w, accepted, time.perf_counter() - start, parses))
+    return results
+
+
+# Yields the words of the iterable by lists of at most size words
+def chunks(words, size):
+    chunk = []
+    for w in words:
+        chunk.append(w)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ------------------------
+
+# Yields one BatchResult per word of words, in the same order, as soon as it is known
+def iter_parse_many(gr, words, engine="earley", workers=None, chunksize=64, lexer=None, maxParses=None):
+    # gr: Grammar
+    # words: iterable of word
+    # engine: String (key of ENGINES)
+    # workers: Integer (number of processes, all the processors if None, no pool if 1)
+    # chunksize: Integer (number of words sent at once to a worker)
+    # lexer: function String -> list of String applied to each word by the workers (a module level
+    #        function, such as CONTI_Grammar.wordTokens, so that it can be sent to them), None to parse the words as they are
+    # maxParses: Integer (the trees of each word are counted up to maxParses by the engine earley-trees), None not to count them
+
+    if engine not in ENGINES:
+        raise ValueError("unknown engine " + repr(engine) + ", expected one of " + ", ".join(ENGINES))
+    # the CYK engines work on the grammar converted to CNF (the same words are generated)
+    if ENGINES[engine][1] and not CONTI_CYK.checkCNF(gr):
+        gr = gr.toCNF()
+
+    # the compiled tables are built here, so they are part of what is sent to the workers
+    gr.compile()
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        init_worker(gr, engine, lexer, maxParses)
+        for chunk in chunks(words, chunksize):
+            yield from parse_chunk(chunk)
+        return
+
+    with Pool(workers, initializer=init_worker, initargs=(gr, engine, lexer, maxParses)) as pool:
+        pending = deque()   # results of the chunks sent to the pool, in the input order
+        for chunk in chunks(words, chunksize):
+            pending.append(pool.apply_async(parse_chunk, (chunk,)))
+            # at most two chunks per worker wait in the pool
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+# Returns the list of the BatchResult of all the words, in the same order
+def parse_many(gr, words, engine="earley", workers=None, chunksize=64, lexer=None, maxParses=None):
+    return list(iter_parse_many(gr, words, engine, workers, chunksize, lexer, maxParses))
@@ -0,0 +1,330 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Benchmark of the parsers on words of increasing length
+#
+#   python3 CONTI_bench.py [--families ...] [--engines ...] [--lengths 10,20,40,80]
+#                          [--save FILE] [--baseline FILE] [--threshold 1.25]
+#
+# Each family is a grammar and a function giving a word of about n letters for it:
+#   - right-recursive: g1 of CONTI_Earley (S --> AS | b, A --> a), words a...ab
+#   - ambiguous: g3 of CONTI_CYK (S --> SA | a, A --> BS | CS...), words abaca...a,
+#     whose number of trees grows exponentially
+#   - epsilon: g3 of CONTI_Earley (A --> ε, S --> A, A --> S...), words a...ab
+#   - random-cnf: a random grammar in CNF (its size is given by --nonterminals, --terminals
+#     and --rules), words generated by random derivations of this grammar
+# For every family, engine and length, the best time of --repeat runs, the peak of the
+# memory allocated during one run (tracemalloc) and the size of the chart (entries of the
+# CYK table, items of the Earley table) are reported, with the exponent k of the best
+# fit time ~ n^k. The grammars are compiled (and converted to CNF for the CYK engines)
+# before the measures.
+#
+# --save writes the results to a JSON file; --baseline reads such a file and reports the
+# measures that are more than --threshold times the saved ones (the exit status is then 1).
+# The times of a baseline only mean something on the machine where it was made.
+# ----------------------------------------------------------------------------------
+
+import argparse
+import gc
+import importlib.util
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+import CONTI_CYK
+import CONTI_Earley
+import CONTI_Earley_trees
+from CONTI_Grammar import Symbol, Rule, Grammar
+
+
+# times below this (in seconds) are too short to be compared with a baseline
+NOISE = 0.001
+
+
+# ------------------------
+# The families: each one is a function (args) -> (Grammar, function Integer -> word)
+
+def right_recursive(args):
+    return CONTI_Earley.g1, lambda n: "a" * (n - 1) + "b"
+
+
+def ambiguous(args):
+    # a (ba|ca)*: the letters b and c alternate, the length is odd
+    return CONTI_CYK.g3, lambda n: "a" + "".join("ba" if k % 2 == 0 else "ca" for k in range((n - 1) // 2))
+
+
+def epsilon(args):
+    return CONTI_Earley.g3, lambda n: "a" * (n - 1) + "b"
+
+
+def random_cnf(args):
+    gr = random_cnf_grammar(args.nonterminals, args.terminals, args.rules, args.seed)
+    # the word of a length is the same for all the engines and all the runs
+    return gr, lambda n: random_word(gr, n, random.Random(args.seed * 1000003 + n))
+
+
+# name of a family -> function building its grammar and its words
+FAMILIES = {
+    "right-recursive": right_recursive,
+    "ambiguous": ambiguous,
+    "epsilon": epsilon,
+    "random-cnf": random_cnf,
+}
+
+
+# Returns a random grammar in CNF with the axiom N0. Every non-terminal has at least one rule A -> a
+# and one rule A -> BC, so that it derives words of every length
+def random_cnf_grammar(nonTerminals, terminals, rules, seed):
+    # nonTerminals: Integer (number of non-terminals N0, N1...)
+    # terminals: Integer (number of terminals t0, t1...)
+    # rules: Integer (number of rules, at least 2 * nonTerminals)
+    # seed: Integer
+
+    rng = random.Random(seed)
+    N = [Symbol("N%d" % k) for k in range(nonTerminals)]
+    V = [Symbol("t%d" % k) for k in range(terminals)]
+    keys = set()    # (lhs, rhs) of the rules already made, so that no rule is made twice
+    ruleList = []
+
+    # Adds the rule a -> rhs if it is not already in the grammar
+    def add(a, rhs):
+        key = (a.name, tuple(s.name for s in rhs))
+        if key not in keys:
+            keys.add(key)
+            ruleList.append(Rule(a, rhs))
+
+    for a in N:
+        add(a, [rng.choice(V)])
+        add(a, [rng.choice(N), rng.choice(N)])
+    # the other rules are binary 4 times out of 5 (a few tries more, in case some are drawn twice)
+    for k in range(10 * rules):
+        if len(ruleList) >= rules:
+            break
+        if rng.random() < 0.8:
+            add(rng.choice(N), [rng.choice(N), rng.choice(N)])
+        else:
+            add(rng.choice(N), [rng.choice(V)])
+    return Grammar(N + V, N[0], ruleList, "random-cnf")
+
+
+# Returns a word of n letters derived from the axiom of the grammar gr built by random_cnf_grammar
+def random_word(gr, n, rng):
+    # gr: Grammar (in CNF, every non-terminal having rules A -> a and A -> BC)
+    # n: Integer (at least 1)
+    # rng: random.Random
+
+    lexical = {}    # A -> list of the rules A -> a
+    binary = {}     # A -> list of the rules A -> BC
+    for r in gr.rules:
+        (lexical if len(r.rhs) == 1 else binary).setdefault(r.lhs, []).append(r)
+
+    word = []
+    todo = [(gr.axiom, n)]  # symbols still to derive, with the length of their subword (the last one first)
+    while todo:
+        a, l = todo.pop()
+        if l == 1:
+            word.append(rng.choice(lexical[a]).rhs[0].name)
+        else:
+            r = rng.choice(binary[a])
+            k = rng.randint(1, l - 1)
+            todo.append((r.rhs[1], l - k))
+            todo.append((r.rhs[0], k))
+    return word
+
+
+# ------------------------
+# The engines: each one is a function (grammar, word) -> Integer (size of the chart)
+
+def chart_cyk(gr, u):
+    T = CONTI_CYK.buildTable(u, gr)
+    return sum(len(cell) for cell in T.values())
+
+
+def chart_cyk_bits(gr, u):
+    T, back = CONTI_CYK.buildBitTable(u, gr)
+    return sum(bin(cell).count("1") for cell in T.values())
+
+
+def chart_cyk_numpy(gr, u):
+    # NumPy is only imported if this engine is used
+    import CONTI_CYK_numpy
+    return int(CONTI_CYK_numpy.buildTableNumpy(u, gr).sum())
+
+
+def chart_earley(gr, w):
+    T = CONTI_Earley.build_earley_table(gr, w, None, True)
+    return sum(cell.cLen() for cell in T.values())
+
+
+def chart_earley_trees(gr, w):
+    T = CONTI_Earley_trees.build_earley_table(gr, w, None, True)
+    return sum(cell.cLen() for cell in T.values())
+
+
+# name of an engine -> (function, True if the engine needs a grammar in CNF)
+ENGINES = {
+    "cyk": (chart_cyk, True),
+    "cyk-bits": (chart_cyk_bits, True),
+    "numpy": (chart_cyk_numpy, True),
+    "earley": (chart_earley, False),
+    "earley-trees": (chart_earley_trees, False),
+}
+
+
+# ------------------------
+
+# Returns the best time of repeat runs of the engine on the word w, the peak of memory of one run and the size of its chart
+def measure(engine, gr, w, repeat):
+    # engine: function (Grammar, word) -> Integer
+    # gr: Grammar (already compiled)
+    # w: word
+    # repeat: Integer
+
+    best = None
+    for k in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        engine(gr, w)
+        t = time.perf_counter() - start
+        best = t if best is None else min(best, t)
+
+    # the memory is measured on another run: tracemalloc slows down the allocations
+    gc.collect()
+    tracemalloc.start()
+    chart = engine(gr, w)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, chart
+
+
+# Yields one result per family, engine and length: a dictionary with the keys family, engine, n, time, peak and chart.
+# For a family and an engine, the lengths after a run longer than args.max_time are skipped
+def run_benchmarks(args):
+    for family in args.families:
+        gr, word = FAMILIES[family](args)
+        gr.compile()
+        for name in args.engines:
+            engine, cnf = ENGINES[name]
+            g = gr.toCNF() if cnf and not CONTI_CYK.checkCNF(gr) else gr
+            g.compile()
+            for n in args.lengths:
+                w = word(n)
+                t, peak, chart = measure(engine, g, w, args.repeat)
+                yield {"family": family, "engine": name, "n": len(w), "time": t, "peak": peak, "chart": chart}
+                if t > args.max_time:
+                    break
+
+
+# Returns the exponent k of the least squares fit of time ~ n^k for the results (None if there are not two lengths)
+def growth(results):
+    points = [(math.log(r["n"]), math.log(r["time"])) for r in results if r["n"] > 0 and r["time"] > 0]
+    if len(set(x for x, y in points)) < 2:
+        return None
+    mx = sum(x for x, y in points) / len(points)
+    my = sum(y for x, y in points) / len(points)
+    return sum((x - mx) * (y - my) for x, y in points) / sum((x - mx) ** 2 for x, y in points)
+
+
+# Prints the results, grouped by family and engine
+def print_report(results, out=None):
+    print("%-16s %-13s %6s %12s %12s %10s" % ("family", "engine", "n", "time (ms)", "peak (KiB)", "chart"), file=out)
+    groups = {}     # (family, engine) -> results, in the order of the runs
+    for r in results:
+        groups.setdefault((r["family"], r["engine"]), []).append(r)
+    for (family, engine), group in groups.items():
+        for r in group:
+            print("%-16s %-13s %6d %12.3f %12.1f %10d" % (family, engine, r["n"], r["time"] * 1000, r["peak"] / 1024, r["chart"]), file=out)
+        k = growth(group)
+        if k is not None:
+            print("%-16s %-13s time ~ n^%.2f" % (family, engine, k), file=out)
+
+
+# Returns the descriptions of the results whose time or memory is more than threshold times the one of the baseline
+def compare(results, baseline, threshold):
+    # results, baseline: lists of results (as given by run_benchmarks)
+    # threshold: Float
+
+    saved = {(r["family"], r["engine"], r["n"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        b = saved.get((r["family"], r["engine"], r["n"]))
+        if b is None:
+            continue
+        if r["time"] > b["time"] * threshold and r["time"] - b["time"] > NOISE:
+            regressions.append("%s %s n=%d: time %.3f ms, was %.3f ms" % (r["family"], r["engine"], r["n"], r["time"] * 1000, b["time"] * 1000))
+        if r["peak"] > b["peak"] * threshold:
+            regressions.append("%s %s n=%d: peak %.1f KiB, was %.1f KiB" % (r["family"], r["engine"], r["n"], r["peak"] / 1024, b["peak"] / 1024))
+    return regressions
+
+
+# Returns the list of the values separated by commas in the string s (each one checked by the function check)
+def comma_list(check):
+    return lambda s: [check(x) for x in s.split(",") if x]
+
+
+def main(argv=None):
+    # argv: list of String (arguments of the command, sys.argv[1:] if None)
+
+    # NumPy is optional: its engine is only run by default when it is installed
+    engines = [e for e in ENGINES if e != "numpy" or importlib.util.find_spec("numpy") is not None]
+
+    parser = argparse.ArgumentParser(description="Measure how the parsers scale with the length of the words.")
+    parser.add_argument("--families", type=comma_list(str), default=list(FAMILIES),
+                        help="families of grammars and words, separated by commas (default: all of " + ", ".join(FAMILIES) + ")")
+    parser.add_argument("--engines", type=comma_list(str), default=engines,
+                        help="engines, separated by commas (default: " + ",".join(engines) + ")")
+    parser.add_argument("--lengths", type=comma_list(int), default=[10, 20, 40, 80], help="lengths of the words (default: 10,20,40,80)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of which the best time is kept (default: 3)")
+    parser.add_argument("--max-time", type=float, default=10.0,
+                        help="after a run longer than this (in seconds), the longer words are skipped (default: 10)")
+    parser.add_argument("--nonterminals", type=int, default=20, help="non-terminals of the random CNF grammar (default: 20)")
+    parser.add_argument("--terminals", type=int, default=10, help="terminals of the random CNF grammar (default: 10)")
+    parser.add_argument("--rules", type=int, default=100, help="rules of the random CNF grammar (default: 100)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random grammar and words (default: 0)")
+    parser.add_argument("--save", metavar="FILE", help="write the results to this JSON file")
+    parser.add_argument("--baseline", metavar="FILE", help="compare the results with the ones saved in this JSON file")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="a measure more than threshold times the baseline is a regression (default: 1.25)")
+    args = parser.parse_args(argv)
+
+    for family in args.families:
+        if family not in FAMILIES:
+            parser.error("unknown family " + repr(family) + ", expected one of " + ", ".join(FAMILIES))
+    for engine in args.engines:
+        if engine not in ENGINES:
+            parser.error("unknown engine " + repr(engine) + ", expected one of " + ", ".join(ENGINES))
+    if not args.lengths or min(args.lengths) < 1:
+        parser.error("the lengths must be at least 1")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.rules < 2 * args.nonterminals:
+        parser.error("--rules must be at least twice --nonterminals")
+
+    results = []
+    for r in run_benchmarks(args):
+        results.append(r)
+        print("%s %s n=%d: %.3f ms" % (r["family"], r["engine"], r["n"], r["time"] * 1000), file=sys.stderr)
+    print_report(results)
+
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump({"lengths": args.lengths, "results": results}, f, indent=1)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        print()
+        if regressions:
+            print("%d regressions (threshold %.2f):" % (len(regressions), args.threshold))
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print("no regression (threshold %.2f)" % args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Command line parser: one word per line in, one JSON object per word and per line out
+#
+#   python3 CONTI_parse.py GRAMMAR [WORDS] [--engine earley-trees] [--tokens chars]
+#                          [--max-parses 1000] [--workers 1] [--chunksize 64] [--cache DIR]
+#
+# GRAMMAR is a grammar file (see CONTI_GrammarFile), WORDS a file with one word per line
+# (the standard input if it is not given or is "-"). For each word a line such as
+#   {"word": "aab", "accepted": true, "parses": 1, "time": 0.000142}
+# is written, in the order of the input; "parses" is the number of trees counted up to
+# --max-parses by the earley-trees engine, null for the other engines (the cyk engine
+# parses the grammar converted to CNF, which does not give back all the trees). When the
+# engine fails on a word, "accepted" and "parses" are null and an "error" field gives the
+# exception, such as
+#   {"word": "aab", "accepted": null, "parses": null, "time": 0.000142, "error": "MemoryError: "}
+# and the next words are parsed as usual. The words are read, parsed and written a few
+# chunks at a time (see CONTI_batch), so the memory used does not depend on the number of
+# words, and the program can be used in the middle of a pipeline.
+# ----------------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import sys
+
+import CONTI_batch
+from CONTI_Grammar import wordTokens
+from CONTI_GrammarFile import loadGrammar
+
+
+# Yields the words of the file f, one per line (without the end of line; an empty line is the empty word)
+def readWords(f):
+    for line in f:
+        yield line.rstrip("\r\n")
+
+
+# Returns the line of JSON written for the BatchResult result
+def formatResult(result):
+    record = {"word": result.word, "accepted": result.accepted, "parses": result.parses, "time": round(result.time, 6)}
+    if result.error is not None:
+        record["error"] = result.error
+    return json.dumps(record, ensure_ascii=False)
+
+
+def main(argv=None):
+    # argv: list of String (arguments of the command, sys.argv[1:] if None)
+
+    parser = argparse.ArgumentParser(description="Parse one word per line and write one JSON result per line.")
+    parser.add_argument("grammar", help="grammar file")
+    parser.add_argument("words", nargs="?", default="-", help="file of words, one per line (standard input if - or not given)")
+    parser.add_argument("--engine", choices=sorted(CONTI_batch.ENGINES), default="earley-trees",
+                        help="parsing engine (default: earley-trees)")
+    parser.add_argument("--tokens", choices=["chars", "words"], default="chars",
+                        help="the terminals are the characters of a line, or its words separated by white space (default: chars)")
+    parser.add_argument("--max-parses", type=int, default=1000,
+                        help="greatest number of trees counted for a word by earley-trees (default: 1000)")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes (default: 1)")
+    parser.add_argument("--chunksize", type=int, default=64, help="number of words sent at once to a process (default: 64)")
+    parser.add_argument("--cache", metavar="DIR", help="directory where the compiled grammar is kept between runs")
+    args = parser.parse_args(argv)
+
+    if args.max_parses < 1:
+        parser.error("--max-parses must be at least 1")
+    if args.chunksize < 1:
+        parser.error("--chunksize must be at least 1")
+    try:
+        gr = loadGrammar(args.grammar, args.cache, CONTI_batch.ENGINES[args.engine][1])
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    lexer = wordTokens if args.tokens == "words" else None
+    f = sys.stdin if args.words == "-" else open(args.words, encoding="utf-8")
+    try:
+        for result in CONTI_batch.iter_parse_many(gr, readWords(f), args.engine, args.workers, args.chunksize,
+                                                  lexer, args.max_parses):
+            sys.stdout.write(formatResult(result) + "\n")
+            # written at once, for the next program of the pipeline
+            sys.stdout.flush()
+    except BrokenPipeError:
+        # the reader stopped (for example head): what is left in the buffer is thrown away
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
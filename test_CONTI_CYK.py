@@ -0,0 +1,229 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Tests of the CYK parsers (python3 -m pytest, or python3 -m unittest)
+#
+# The weighted parser is compared with a brute force computation of the best
+# derivation of each word, on small random grammars converted to CNF.
+# ----------------------------------------------------------------------------------
+
+import importlib.util
+import itertools
+import random
+import unittest
+
+import CONTI_CYK
+import CONTI_CYK_parallel
+from CONTI_Grammar import Symbol, Rule, Grammar
+
+
+# Yields the ways of cutting w[i] ... w[j-1] into k consecutive (possibly empty) subwords, as lists of (start, end)
+def splits(k, i, j):
+    if k == 0:
+        if i == j:
+            yield []
+        return
+    for m in range(i, j + 1):
+        for rest in splits(k - 1, m, j):
+            yield [(i, m)] + rest
+
+
+# Returns the dictionary (X, i, j) -> greatest weight of a derivation X -->* w[i] ... w[j-1],
+# relaxed until nothing changes (the weights are <= 0, so it stops)
+def bestScores(gr, w):
+    best = {}
+    changed = True
+    while changed:
+        changed = False
+        for r in gr.rules:
+            for i in range(len(w) + 1):
+                for j in range(i, len(w) + 1):
+                    for sp in splits(len(r.rhs), i, j):
+                        score = r.weight
+                        for s, (a, b) in zip(r.rhs, sp):
+                            if gr.isNonTerminal(s):
+                                if (s, a, b) not in best:
+                                    break
+                                score += best[s, a, b]
+                            elif not (b == a + 1 and w[a] == s.name):
+                                break
+                        else:
+                            if (r.lhs, i, j) not in best or score > best[r.lhs, i, j] + 1e-9:
+                                best[r.lhs, i, j] = score
+                                changed = True
+    return best
+
+
+# Returns the weight of the tree t for the grammar gr (the best rule for each node, if a rule is written twice)
+def treeWeight(gr, t):
+    total = 0.0
+    todo = [t]
+    while todo:
+        node = todo.pop()
+        names = [b.name if isinstance(b, Symbol) else b.label.name for b in node.branches]
+        weights = [r.weight for r in gr.rules if r.lhs == node.label and [s.name for s in r.rhs] == names]
+        assert weights, "no rule for a node of the tree"
+        total += max(weights)
+        todo.extend(b for b in node.branches if not isinstance(b, Symbol))
+    return total
+
+
+# Returns the word spelled by the leaves of the tree t
+def leaves(t):
+    word = []
+    todo = [t]
+    while todo:
+        node = todo.pop()
+        if isinstance(node, Symbol):
+            word.append(node.name)
+        else:
+            todo.extend(reversed(node.branches))
+    return "".join(word)
+
+
+# Returns a random weighted grammar on the non-terminals S, A, B, C and the terminals a, b
+def randomGrammar(rng):
+    N = [Symbol(c) for c in "SABC"]
+    V = [Symbol(c) for c in "ab"]
+    rules = [Rule(rng.choice(N), [rng.choice(N + V) for k in range(rng.randint(0, 3))], -rng.randint(0, 6) / 2)
+             for k in range(rng.randint(3, 9))]
+    return Grammar(N + V, N[0], rules, "random")
+
+
+class ViterbiTest(unittest.TestCase):
+
+    # Checks that the Viterbi parser gives the best score of the word for gr, and a tree of this score
+    def checkViterbi(self, gr, u):
+        cnf = gr if CONTI_CYK.checkCNF(gr) else gr.toCNF()
+        result = CONTI_CYK.viterbiTree(CONTI_CYK.buildViterbiTable(u, cnf), u, cnf)
+        best = bestScores(gr, u).get((gr.axiom, 0, len(u)))
+        if best is None:
+            self.assertIsNone(result, u)
+            return
+        self.assertIsNotNone(result, u)
+        score, tree = result
+        self.assertAlmostEqual(score, best, msg=u)
+        self.assertEqual(leaves(tree), u)
+        self.assertAlmostEqual(treeWeight(gr, tree), score, msg=u)
+
+    def testBestEpsilonDerivation(self):
+        S, A, B, a = Symbol("S"), Symbol("A"), Symbol("B"), Symbol("a")
+        gr = Grammar([S, A, B, a], S, [Rule(S, [A, a]), Rule(A, [], -5.0), Rule(A, [B]), Rule(B, [])], "eps")
+        self.checkViterbi(gr, "a")
+
+    def testDuplicateEpsilonRules(self):
+        S = Symbol("S")
+        gr = Grammar([S], S, [Rule(S, [], -2.51), Rule(S, [], -0.08)], "dup")
+        self.checkViterbi(gr, "")
+
+    def testBestUnitChain(self):
+        S, A, B, C, a = Symbol("S"), Symbol("A"), Symbol("B"), Symbol("C"), Symbol("a")
+        gr = Grammar([S, A, B, C, a], S, [Rule(S, [A]), Rule(A, [C], -4.0), Rule(A, [B]), Rule(B, [C]),
+                                          Rule(C, [a]), Rule(C, [C, C], -1.0)], "unit")
+        for u in ["a", "aa", "aaa"]:
+            self.checkViterbi(gr, u)
+
+    def testRandomGrammars(self):
+        rng = random.Random(10)
+        for trial in range(150):
+            gr = randomGrammar(rng)
+            for n in range(4):
+                for u in itertools.product("ab", repeat=n):
+                    self.checkViterbi(gr, "".join(u))
+
+
+class TreesTest(unittest.TestCase):
+
+    def testAllTrees(self):
+        S, a = Symbol("S"), Symbol("a")
+        gr = Grammar([S, a], S, [Rule(S, [S, S]), Rule(S, [a])], "catalan")
+        trees = [str(t) for t in CONTI_CYK.iterTrees(CONTI_CYK.buildTable("aaaaa", gr), "aaaaa", gr)]
+        self.assertEqual(len(trees), 14)
+        self.assertEqual(len(set(trees)), 14)
+
+    # A right comb of depth n, built by hand: building the table of such a word with CYK takes too long
+    def testDeepForest(self):
+        S, A, a = Symbol("S"), Symbol("A"), Symbol("a")
+        n = 3000
+        node = CONTI_CYK.ForestNode(S, n - 1, n)
+        node.alternatives.append((a,))
+        for i in range(n - 2, -1, -1):
+            left = CONTI_CYK.ForestNode(A, i, i + 1)
+            left.alternatives.append((a,))
+            parent = CONTI_CYK.ForestNode(S, i, n)
+            parent.alternatives.append((left, node))
+            node = parent
+        trees = list(node.trees())
+        self.assertEqual(len(trees), 1)
+        self.assertEqual(leaves(trees[0]), "a" * n)
+
+    def testDeepUntransform(self):
+        S, a = Symbol("S"), Symbol("a")
+        cnf = Grammar([S, a], S, [Rule(S, [a, S]), Rule(S, [a])], "comb").toCNF()
+        A = next(r.rhs[0] for r in cnf.rules if len(r.rhs) == 2)
+        n = 3000
+        t = CONTI_CYK.Tree(S, [a])
+        for i in range(n - 1):
+            t = CONTI_CYK.Tree(S, [CONTI_CYK.Tree(A, [a]), t])
+        source = cnf.untransform(t)
+        self.assertEqual(leaves(source), "a" * n)
+        self.assertEqual(treeWeight(cnf.source, source), 0.0)
+
+
+class IncrementalTest(unittest.TestCase):
+
+    def testEmptyPrefix(self):
+        S, a, b = Symbol("S"), Symbol("a"), Symbol("b")
+        cnf = Grammar([S, a, b], S, [Rule(S, [a, S, b]), Rule(S, [])], "anbn").toCNF()
+        parser = CONTI_CYK.IncrementalCYK(cnf)
+        self.assertTrue(parser.isSuccess())
+        self.assertEqual([str(t) for t in parser.iterTrees()], ["[ S,  ]"])
+        for token, accepted in zip("aabb", [False, False, False, True]):
+            parser.extend(token)
+            self.assertEqual(parser.isSuccess(), accepted)
+        self.assertEqual([str(t) for t in parser.iterTrees()],
+                         [str(t) for t in CONTI_CYK.iterTrees(CONTI_CYK.buildTable("aabb", cnf), "aabb", cnf)])
+
+    def testEmptyPrefixRejected(self):
+        parser = CONTI_CYK.IncrementalCYK(CONTI_CYK.g1)
+        self.assertFalse(parser.isSuccess())
+        self.assertEqual(list(parser.iterTrees()), [])
+
+
+class ParallelTest(unittest.TestCase):
+
+    # Every diagonal is split between the workers, even for short words
+    def testSameTable(self):
+        rng = random.Random(7)
+        N = [Symbol(c) for c in "SABC"]
+        V = [Symbol(c) for c in "ab"]
+        for trial in range(4):
+            rules = [Rule(rng.choice(N), [rng.choice(N), rng.choice(N)]) for k in range(8)] + \
+                    [Rule(rng.choice(N), [rng.choice(V)]) for k in range(4)]
+            cnf = Grammar(N + V, N[0], rules, "cnf")
+            for n in (0, 1, 5, 12):
+                u = "".join(rng.choice("ab") for k in range(n))
+                self.assertEqual(CONTI_CYK_parallel.buildBitTableParallel(u, cnf, workers=2, threshold=0, minCells=1),
+                                 CONTI_CYK.buildBitTable(u, cnf))
+
+
+@unittest.skipUnless(importlib.util.find_spec("numpy"), "NumPy is not installed")
+class NumpyTest(unittest.TestCase):
+
+    # The table only has a row per non-terminal, however many terminals there are
+    def testLargeVocabulary(self):
+        import CONTI_CYK_numpy
+        rng = random.Random(5)
+        N = [Symbol("N%d" % k) for k in range(6)]
+        V = [Symbol("t%d" % k) for k in range(5000)]
+        rules = [Rule(rng.choice(N), [rng.choice(N), rng.choice(N)]) for k in range(30)] + [Rule(rng.choice(N), [v]) for v in V]
+        gr = Grammar(N + V, N[0], rules, "vocabulary")
+        for trial in range(20):
+            u = [rng.choice(V[:4]).name for k in range(rng.randint(0, 8))]
+            T = CONTI_CYK_numpy.buildTableNumpy(u, gr)
+            self.assertEqual(T.shape[2], len(N))
+            self.assertEqual(CONTI_CYK_numpy.isSuccessNumpy(T, u, gr), CONTI_CYK.isSuccess(CONTI_CYK.buildTable(u, gr), u, gr))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Tests of the trees of the Earley parser (python3 -m pytest, or python3 -m unittest)
+# ----------------------------------------------------------------------------------
+
+import unittest
+from itertools import islice
+
+import CONTI_Earley_trees
+from CONTI_Grammar import Symbol, Rule, Grammar
+
+
+# Returns the word spelled by the leaves of the tree t
+def leaves(t):
+    word = []
+    todo = [t]
+    while todo:
+        node = todo.pop()
+        if isinstance(node, Symbol):
+            word.append(node.name)
+        else:
+            todo.extend(reversed(node.branches))
+    return "".join(word)
+
+
+# Returns the trees of the word w for the grammar g (at most limit of them)
+def trees(g, w, limit=None, lookahead=False):
+    T = CONTI_Earley_trees.build_earley_table(g, w, None, lookahead)
+    return list(islice(CONTI_Earley_trees.iter_trees(g, w, T), limit))
+
+
+class TreesTest(unittest.TestCase):
+
+    def testAllTrees(self):
+        S, a = Symbol("S"), Symbol("a")
+        g = Grammar([S, a], S, [Rule(S, [S, S]), Rule(S, [a])], "catalan")
+        found = [str(t) for t in trees(g, "aaaaa")]
+        self.assertEqual(len(found), 14)
+        self.assertEqual(len(set(found)), 14)
+
+    def testCyclicGrammar(self):
+        S, A, a = Symbol("S"), Symbol("A"), Symbol("a")
+        g = Grammar([S, A, a], S, [Rule(S, [A]), Rule(A, [S]), Rule(A, [a])], "cycle")
+        self.assertEqual([str(t) for t in trees(g, "a")], ["[ S, [ A, a ] ]"])
+
+    # The trees are deeper than the recursion limit, with and without the Leo chains (right recursion)
+    def testDeepTrees(self):
+        S, a = Symbol("S"), Symbol("a")
+        for rules in ([Rule(S, [a, S]), Rule(S, [a])], [Rule(S, [S, a]), Rule(S, [a])]):
+            g = Grammar([S, a], S, rules, "comb")
+            for lookahead in (False, True):
+                found = trees(g, "a" * 3000, 2, lookahead)
+                self.assertEqual(len(found), 1)
+                self.assertEqual(leaves(found[0]), "a" * 3000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Tests of the statistics of a parse (python3 -m pytest, or python3 -m unittest)
+# ----------------------------------------------------------------------------------
+
+import unittest
+
+import CONTI_CYK
+import CONTI_Earley
+import CONTI_Earley_trees
+from CONTI_Stats import ParseStats
+
+
+class StatsTest(unittest.TestCase):
+
+    def testCYK(self):
+        stats = ParseStats()
+        CONTI_CYK.buildTable("abaca", CONTI_CYK.g3, stats)
+        self.assertEqual(set(stats.times), {"init", "loop"})
+        self.assertEqual(stats.operations, {"init": 5, "loop": 7})
+        self.assertEqual(stats.cellTrees[0, 5], 2)
+        # one tree per rule applied
+        self.assertEqual(sum(stats.ruleApplications.values()), 12)
+        self.assertIn("rules applied the most:", stats.report(CONTI_CYK.g3))
+
+    def testEarley(self):
+        # the two parsers build the same items, but do not reject the same ones
+        for module, duplicates in ((CONTI_Earley, 81), (CONTI_Earley_trees, 14)):
+            stats = ParseStats()
+            module.build_earley_table(module.g3, "aab", None, False, stats)
+            self.assertEqual(set(stats.times), {"init", "close", "scan"})
+            self.assertEqual(stats.columnItems, [11, 16, 20, 25])
+            self.assertEqual(stats.operations, {"pred": 22, "scan": 4, "comp": 37})
+            self.assertEqual(stats.duplicates, duplicates)
+            # one application per item
+            self.assertEqual(sum(stats.ruleApplications.values()), 72)
+            self.assertIn("items per column: 11 16 20 25", stats.report(module.g3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Differential tests of the parsers (python3 -m pytest, or python3 -m unittest)
+#
+# On small random grammars (with ε-rules, unit rules and cycles such as A --> A),
+# every engine must accept the same words as a brute force recognizer, and the
+# Earley parser with trees must give the same trees as a brute force enumerator. The
+# Earley parsers are checked with and without the lookahead of the predictions.
+# ----------------------------------------------------------------------------------
+
+import itertools
+import random
+import unittest
+from itertools import islice
+
+import CONTI_CYK
+import CONTI_Earley
+import CONTI_Earley_trees
+import CONTI_batch
+from CONTI_Grammar import Symbol, Rule, Grammar
+
+# greatest number of trees compared for a word
+LIMIT = 500
+
+
+# Yields the ways of cutting w[i] ... w[j-1] into k consecutive (possibly empty) subwords, as lists of (start, end)
+def splits(k, i, j):
+    if k == 0:
+        if i == j:
+            yield []
+        return
+    for m in range(i, j + 1):
+        for rest in splits(k - 1, m, j):
+            yield [(i, m)] + rest
+
+
+# Returns True if the rule r gives w[i] ... w[j-1] from the subwords cut by sp, the (X, i, j) of derived being known
+def derives(gr, r, w, sp, derived):
+    for s, (a, b) in zip(r.rhs, sp):
+        if gr.isNonTerminal(s):
+            if (s, a, b) not in derived:
+                return False
+        elif not (b == a + 1 and w[a] == s.name):
+            return False
+    return True
+
+
+# Returns True if the word w is generated by the grammar gr: the set of the (X, i, j) such that
+# X -->* w[i] ... w[j-1] is grown until nothing changes
+def bruteRecognize(gr, w):
+    derived = set()
+    changed = True
+    while changed:
+        changed = False
+        for r in gr.rules:
+            for i in range(len(w) + 1):
+                for j in range(i, len(w) + 1):
+                    if (r.lhs, i, j) not in derived and any(derives(gr, r, w, sp, derived) for sp in splits(len(r.rhs), i, j)):
+                        derived.add((r.lhs, i, j))
+                        changed = True
+    return (gr.axiom, 0, len(w)) in derived
+
+
+# Returns the trees of X for w[i] ... w[j-1] (as strings) where no (X, i, j) is below itself,
+# path being the (X, i, j) with the same span above this one (memo keeps the lists already computed)
+def bruteTrees(gr, X, i, j, w, path=frozenset(), memo=None):
+    memo = {} if memo is None else memo
+    if (X, i, j, path) in memo:
+        return memo[X, i, j, path]
+    trees = []
+    if (X, i, j) not in path:
+        above = path | {(X, i, j)}
+        for r in gr.rules:
+            if r.lhs != X:
+                continue
+            for sp in splits(len(r.rhs), i, j):
+                options = []  # the possible branches for each symbol of the rhs
+                for s, (a, b) in zip(r.rhs, sp):
+                    if gr.isNonTerminal(s):
+                        options.append(bruteTrees(gr, s, a, b, w, above if (a, b) == (i, j) else frozenset(), memo))
+                    else:
+                        options.append([s.name] if b == a + 1 and w[a] == s.name else [])
+                for branches in islice(itertools.product(*options), LIMIT + 1):
+                    trees.append("[ " + X.name + ", " + ", ".join(branches) + " ]")
+    memo[X, i, j, path] = trees
+    return trees
+
+
+# Returns a random grammar on the non-terminals S, A, B, C and the terminals a, b (the same
+# rule can be written twice)
+def randomGrammar(rng):
+    N = [Symbol(c) for c in "SABC"]
+    V = [Symbol(c) for c in "ab"]
+    rules = [Rule(rng.choice(N), [rng.choice(N + V) for k in range(rng.randint(0, 3))])
+             for k in range(rng.randint(3, 9))]
+    return Grammar(N + V, N[0], rules, "random")
+
+
+# Yields (grammar, word) for the words of length at most 3 of count random grammars
+def cases(seed, count):
+    rng = random.Random(seed)
+    for trial in range(count):
+        gr = randomGrammar(rng)
+        for n in range(4):
+            for w in itertools.product("ab", repeat=n):
+                yield gr, "".join(w)
+
+
+class EnginesTest(unittest.TestCase):
+
+    def testRecognizers(self):
+        engines = dict(CONTI_batch.ENGINES)
+        try:
+            import numpy
+        except ImportError:
+            del engines["numpy"]
+        converted = {}  # grammar -> the same grammar converted to CNF
+        for gr, w in cases(18, 300):
+            expected = bruteRecognize(gr, w)
+            if gr not in converted:
+                converted[gr] = gr.toCNF()
+            cnf = converted[gr]
+            for name, (recognize, needsCNF) in engines.items():
+                self.assertEqual(recognize(cnf if needsCNF else gr, w)[0], expected, (name, w, str(gr)))
+            for lookahead in (False, True):
+                T = CONTI_Earley.build_earley_table(gr, w, None, lookahead)
+                self.assertEqual(CONTI_Earley.table_complete(gr, w, T), expected, ("earley", lookahead, w, str(gr)))
+                T = CONTI_Earley_trees.build_earley_table(gr, w, None, lookahead)
+                self.assertEqual(CONTI_Earley_trees.table_complete(gr, w, T), expected, ("earley-trees", lookahead, w, str(gr)))
+            incremental = CONTI_CYK.IncrementalCYK(cnf)
+            parser = CONTI_Earley.EarleyParser(gr)
+            for token in w:
+                incremental.extend(token)
+                parser.feed(token)
+            self.assertEqual(incremental.isSuccess(), expected, ("incremental", w, str(gr)))
+            self.assertEqual(parser.accepts(), expected, ("streaming", w, str(gr)))
+
+    def testTrees(self):
+        for gr, w in cases(20, 300):
+            expected = sorted(bruteTrees(gr, gr.axiom, 0, len(w), w))
+            if len(expected) > LIMIT:
+                continue
+            for lookahead in (False, True):
+                T = CONTI_Earley_trees.build_earley_table(gr, w, None, lookahead)
+                found = sorted(str(t) for t in islice(CONTI_Earley_trees.iter_trees(gr, w, T), LIMIT + 1))
+                self.assertEqual(found, expected, (lookahead, w, str(gr)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+# -*- encoding: utf-8 -*-
+# ----------------------------------------------------------------------------------
+# Tests of the command line parser (python3 -m pytest, or python3 -m unittest)
+# ----------------------------------------------------------------------------------
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import CONTI_batch
+import CONTI_parse
+
+
+# Engine which fails on the words containing a b
+def failing_engine(gr, w, maxParses=None):
+    if "b" in w:
+        raise ValueError("no b")
+    return True, None
+
+
+class ParseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.grammar = os.path.join(self.dir.name, "comb.txt")
+        with open(self.grammar, "w", encoding="utf-8") as f:
+            f.write("S -> a S | a\n")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    # Returns the records written by the command for the words
+    def run_parse(self, words, *options):
+        path = os.path.join(self.dir.name, "words.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("".join(w + "\n" for w in words))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(CONTI_parse.main([self.grammar, path] + list(options)), 0)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_long_words(self):
+        records = self.run_parse(["a" * 700, "a" * 4000, "b"])
+        self.assertEqual([(r["accepted"], r["parses"]) for r in records], [(True, 1), (True, 1), (False, 0)])
+        self.assertTrue(all("error" not in r for r in records))
+
+    def test_error_record(self):
+        with mock.patch.dict(CONTI_batch.ENGINES, {"failing": (failing_engine, False)}):
+            records = self.run_parse(["a", "ab", "aa"], "--engine", "failing")
+        self.assertEqual([r["word"] for r in records], ["a", "ab", "aa"])
+        self.assertEqual([r["accepted"] for r in records], [True, None, True])
+        self.assertEqual(records[1]["error"], "ValueError: no b")
+
+
+if __name__ == "__main__":
+    unittest.main()